@@ -0,0 +1,36 @@
+"""Benchmark scenarios for the JSON API (see `manage.py benchmark`)."""
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from litreview.bench import measure, scenario
+from reviews.benchmarks import seed
+
+
+@scenario('api_vs_html')
+def api_vs_html(repeat):
+    """Latency, queries and payload size of the JSON API next to the equivalent HTML pages."""
+    people, shelf = seed(books=50, users=20, reviews_per_book=20)
+    book, author = shelf[1], people[0]
+    client = Client()
+    pages = [
+        ('feed', reverse('reviews:home'), reverse('api:feed')),
+        ('feed, 3 fields', None, reverse('api:feed') + '?fields=headline,rating,author'),
+        ('book detail', reverse('reviews:book_detail', args=[book.pk]), reverse('api:book', args=[book.pk])),
+        ('book reviews', None, reverse('api:book_reviews', args=[book.pk]) + '?limit=50'),
+        ('user profile', reverse('users:profile_detail', args=[author.pk]), reverse('api:user', args=[author.pk])),
+        ('user reviews', None, reverse('api:user_reviews', args=[author.pk])),
+    ]
+    rows = []
+    for label, html_url, api_url in pages:
+        if html_url is not None:
+            # the anonymous book page is cached: measure it uncached, like the API
+            stats = measure(lambda: client.get(html_url), repeat, setup=cache.clear)
+            rows.append((f'{label}: HTML', {**stats, 'bytes': len(client.get(html_url).content)}))
+        stats = measure(lambda: client.get(api_url), repeat)
+        response = client.get(api_url)
+        rows.append((f'{label}: JSON', {**stats, 'bytes': len(response.content)}))
+        etag = response['ETag']
+        stats = measure(lambda: client.get(api_url, headers={'If-None-Match': etag}), repeat)
+        rows.append((f'{label}: JSON, 304', {**stats, 'bytes': 0}))
+    return rows
@@ -0,0 +1,179 @@
+"""Building blocks for the read-only JSON API.
+
+Endpoints serialize straight from ``QuerySet.values()``, so no model instance is
+created per row. Every endpoint declares the fields it can return; clients pick
+a subset with ``?fields=a,b`` and only those columns are selected.
+
+List endpoints page with keyset cursors on ``(created, id)``, newest first:
+``?cursor=`` is the opaque ``next`` value of the previous page, so fetching any
+page costs the same whatever its depth (no ``OFFSET``).
+
+Responses carry an ETag derived from the versions of the rows they contain,
+by default their ``updated`` timestamps (see `Endpoint.row_version`); a matching
+``If-None-Match`` is answered with 304 before any JSON is encoded.
+"""
+import hashlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidQuery(ValueError):
+    """A query string parameter the endpoint cannot honour (answered with 400)."""
+
+
+def encode_cursor(created, pk):
+    return urlsafe_b64encode(f'{created.isoformat()}|{pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the `(created, id)` position encoded in `cursor`."""
+    try:
+        created, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created), int(pk)
+    except ValueError:  # also covers binascii.Error and UnicodeDecodeError
+        raise InvalidQuery('Invalid cursor.')
+
+
+class Endpoint(View):
+    """Base class for read-only endpoints serialized with `QuerySet.values()`.
+
+    `fields` maps each public field name to None for a model field of the same
+    name, or to an expression (lookups through `F`, aggregates, subqueries).
+    `transforms` maps field names to functions applied to the selected value.
+    `hidden_fields`, declared the same way, are always selected (for cursors and
+    ETags) but only returned when they are also requested public fields.
+    """
+    http_method_names = ['get', 'head', 'options']
+    fields = {}
+    transforms = {}
+    hidden_fields = {'id': None, 'updated': None}
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        try:
+            names = self.selected_fields()
+            payload = self.get_payload(names)
+        except InvalidQuery as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        if payload is None:
+            return JsonResponse({'error': 'Not found.'}, status=404)
+
+        etag = '"%s"' % hashlib.md5(
+            f'{request.get_full_path()}|{self.get_version(payload)}'.encode(), usedforsecurity=False
+        ).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(self.render(payload, names), json_dumps_params={'separators': (',', ':')})
+        response.headers['ETag'] = etag
+        # always revalidate: a 304 is cheaper than a stale copy
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def selected_fields(self):
+        """Public field names requested with `?fields=` (all fields by default)."""
+        requested = self.request.GET.get('fields', '')
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        if not names:
+            return list(self.fields)
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidQuery(f"Unknown field(s): {', '.join(unknown)}.")
+        return list(dict.fromkeys(names))
+
+    def values(self, queryset, names):
+        """`queryset.values()` selecting `names` plus the hidden fields."""
+        selected = {**self.hidden_fields, **{name: self.fields[name] for name in names}}
+        plain = [name for name, expression in selected.items() if expression is None]
+        expressions = {name: expression for name, expression in selected.items() if expression is not None}
+        return queryset.values(*plain, **expressions)
+
+    def get_payload(self, names):
+        """Return the rows to render (None for a 404)."""
+        raise NotImplementedError
+
+    def get_version(self, payload):
+        """A string that changes whenever the rendered `payload` would change."""
+        raise NotImplementedError
+
+    def row_version(self, row):
+        """A string that changes whenever `row` would render differently.
+
+        Endpoints selecting fields from other tables must add what versions those
+        fields to `hidden_fields` and to this string.
+        """
+        return f"{row['id']}:{row['updated'].isoformat()}"
+
+    def render(self, payload, names):
+        raise NotImplementedError
+
+    def serialize(self, row, names):
+        """Public representation of a `values()` row: requested fields only, transformed."""
+        return {
+            name: self.transforms[name](row[name]) if name in self.transforms else row[name]
+            for name in names
+        }
+
+
+class DetailEndpoint(Endpoint):
+    """A single object, looked up by the `pk` URL keyword argument."""
+
+    def get_payload(self, names):
+        return self.values(self.get_queryset().filter(pk=self.kwargs['pk']), names).first()
+
+    def get_version(self, row):
+        return self.row_version(row)
+
+    def render(self, row, names):
+        return self.serialize(row, names)
+
+
+class ListEndpoint(Endpoint):
+    """A keyset-paginated list, newest first.
+
+    `?limit=` sets the page size (at most `MAX_PAGE_SIZE`) and `?cursor=` resumes
+    after the last row of the previous page. Responses are
+    ``{"results": [...], "next": cursor or null}``.
+    """
+    hidden_fields = {'id': None, 'created': None, 'updated': None}
+
+    def page_size(self):
+        limit = self.request.GET.get('limit')
+        if limit is None:
+            return PAGE_SIZE
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidQuery('limit must be an integer.')
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise InvalidQuery(f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+        return limit
+
+    def get_payload(self, names):
+        limit = self.page_size()
+        queryset = self.get_queryset()
+        cursor = self.request.GET.get('cursor')
+        if cursor:
+            created, pk = decode_cursor(cursor)
+            queryset = queryset.filter(Q(created__lt=created) | Q(created=created, pk__lt=pk))
+        # one extra row tells whether there is a next page
+        rows = list(self.values(queryset.order_by('-created', '-pk'), names)[:limit + 1])
+        next_cursor = encode_cursor(rows[limit - 1]['created'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def get_version(self, payload):
+        rows, next_cursor = payload
+        return ','.join(self.row_version(row) for row in rows) + f'|{next_cursor}'
+
+    def render(self, payload, names):
+        rows, next_cursor = payload
+        return {'results': [self.serialize(row, names) for row in rows], 'next': next_cursor}
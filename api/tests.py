@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from reviews.models import Book, Review
+
+
+class ReviewETagTests(TestCase):
+    """Review ETags change with the joined book title and author name."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='reader', first_name='Ada', last_name='Reader')
+        self.book = Book.objects.create(title='Dune')
+        self.review = Review.objects.create(book=self.book, user=self.user, headline='h', body='b', rating=4)
+        self.urls = [reverse('api:reviews'), reverse('api:review', args=[self.review.pk])]
+
+    def etags(self):
+        return [self.client.get(url).headers['ETag'] for url in self.urls]
+
+    def test_unchanged(self):
+        etags = self.etags()
+        self.assertEqual(self.etags(), etags)
+        for url, etag in zip(self.urls, etags):
+            self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+
+    def test_book_renamed(self):
+        etags = self.etags()
+        self.book.title = 'Dune Messiah'
+        self.book.save()
+        for old, new in zip(etags, self.etags()):
+            self.assertNotEqual(old, new)
+
+    def test_author_renamed(self):
+        etags = self.etags()
+        self.user.last_name = 'Lovelace'
+        self.user.save()
+        for old, new in zip(etags, self.etags()):
+            self.assertNotEqual(old, new)
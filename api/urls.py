@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('books/', views.BookListView.as_view(), name='books'),
+    path('books/<int:pk>/', views.BookDetailView.as_view(), name='book'),
+    path('books/<int:pk>/reviews/', views.BookReviewListView.as_view(), name='book_reviews'),
+    path('reviews/', views.ReviewListView.as_view(), name='reviews'),
+    path('reviews/<int:pk>/', views.ReviewDetailView.as_view(), name='review'),
+    path('users/<int:pk>/', views.UserDetailView.as_view(), name='user'),
+    path('users/<int:pk>/reviews/', views.UserReviewListView.as_view(), name='user_reviews'),
+    path('feed/', views.FeedView.as_view(), name='feed'),
+]
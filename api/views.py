@@ -0,0 +1,162 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db.models import Avg, Count, F, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+
+from reviews.models import Book, Review
+
+from .endpoints import DetailEndpoint, ListEndpoint
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+BOOK_FIELDS = {
+    'id': None,
+    'title': None,
+    'description': None,
+    'image': None,
+    'created': None,
+    'updated': None,
+}
+
+REVIEW_FIELDS = {
+    'id': None,
+    'headline': None,
+    'body': None,
+    'rating': None,
+    'created': None,
+    'updated': None,
+    'book_id': None,
+    'book_title': F('book__title'),
+    'user_id': None,
+    'author': Concat('user__first_name', Value(' '), 'user__last_name'),
+}
+
+# `book_title` and `author` are read from other tables, so editing them leaves
+# `Review.updated` alone: the ETag must also cover the book and the author's name
+REVIEW_VERSION_FIELDS = {
+    'book_updated': F('book__updated'),
+    'author': REVIEW_FIELDS['author'],
+}
+
+
+class ReviewVersionMixin:
+    """Row versions of review endpoints, covering the joined book and author."""
+
+    def row_version(self, row):
+        # users have no `updated` timestamp: use the author's name itself, as `UserDetailView` does
+        return f"{super().row_version(row)}:{row['book_updated'].isoformat()}:{row['author']!r}"
+
+
+class BookListView(ListEndpoint):
+    """Books, newest first; `?q=` filters on the title (case-insensitive)."""
+    fields = BOOK_FIELDS
+    transforms = {'image': media_url}
+
+    def get_queryset(self):
+        queryset = Book.objects.all()
+        q = self.request.GET.get('q', '').strip()
+        if q:
+            queryset = queryset.filter(title__icontains=q)
+        return queryset
+
+
+class BookDetailView(DetailEndpoint):
+    """A book with its rating aggregates over all reviews."""
+    fields = {
+        **BOOK_FIELDS,
+        'avg_rating': Avg('review__rating'),
+        'reviews_count': Count('review'),
+    }
+    transforms = {'image': media_url}
+    # the aggregates change with the reviews, not with `Book.updated`
+    hidden_fields = {
+        **DetailEndpoint.hidden_fields,
+        'reviews_count': Count('review'),
+        'reviews_updated': Max('review__updated'),
+    }
+
+    def get_queryset(self):
+        return Book.objects.all()
+
+    def get_version(self, row):
+        reviews_updated = row['reviews_updated'].isoformat() if row['reviews_updated'] else ''
+        return f"{super().get_version(row)}:{row['reviews_count']}:{reviews_updated}"
+
+
+class ReviewListView(ReviewVersionMixin, ListEndpoint):
+    """All reviews, newest first."""
+    fields = REVIEW_FIELDS
+    hidden_fields = {**ListEndpoint.hidden_fields, **REVIEW_VERSION_FIELDS}
+
+    def get_queryset(self):
+        return Review.objects.all()
+
+
+class ReviewDetailView(ReviewVersionMixin, DetailEndpoint):
+    fields = REVIEW_FIELDS
+    hidden_fields = {**DetailEndpoint.hidden_fields, **REVIEW_VERSION_FIELDS}
+
+    def get_queryset(self):
+        return Review.objects.all()
+
+
+class BookReviewListView(ReviewListView):
+    """Reviews of the book `pk`, newest first."""
+
+    def get_queryset(self):
+        return Review.objects.filter(book_id=self.kwargs['pk'])
+
+
+class UserReviewListView(ReviewListView):
+    """Reviews written by the user `pk`, newest first."""
+
+    def get_queryset(self):
+        return Review.objects.filter(user_id=self.kwargs['pk'])
+
+
+class FeedView(ReviewListView):
+    """The home feed: reviews by the users the viewer follows, or all reviews when anonymous."""
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_authenticated:
+            return Review.objects.filter(user__in=user.following.all())
+        return Review.objects.all()
+
+
+def _follow_count(column):
+    """Subquery counting the follow relations whose `column` is the outer user."""
+    Follow = get_user_model().following.through
+    count = (
+        Follow.objects.filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(count, output_field=IntegerField()), 0)
+
+
+class UserDetailView(DetailEndpoint):
+    """A user's public profile.
+
+    Users have no `updated` timestamp, so the ETag is derived from the profile itself.
+    """
+    fields = {
+        'id': None,
+        'username': None,
+        'first_name': None,
+        'last_name': None,
+        'following_count': _follow_count('from_user'),
+        'followers_count': _follow_count('to_user'),
+    }
+    hidden_fields = {'id': None}
+
+    def get_queryset(self):
+        return get_user_model().objects.filter(is_active=True)
+
+    def get_version(self, row):
+        return repr(sorted(row.items()))
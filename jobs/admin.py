@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'updated')
+    list_filter = ('status', 'task')
+    search_fields = ('=dedupe_key', 'task')
+    readonly_fields = ('created', 'updated', 'claimed_by', 'claimed_at', 'last_error')
@@ -0,0 +1,134 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connections
+from django.utils.module_loading import autodiscover_modules
+
+from jobs import queue
+
+# how often (seconds) a worker process requeues abandoned jobs and purges old ones
+HOUSEKEEPING_INTERVAL = 60
+
+logger = logging.getLogger(__name__)
+
+
+def _run_job(job):
+    try:
+        queue.run(job)
+    finally:
+        close_old_connections()
+
+
+def _job_finished(job, future):
+    # `queue.run` handles task errors itself: anything raised here means the
+    # outcome could not be recorded, and the job stays running until its lease expires
+    exc = future.exception()
+    if exc is not None:
+        logger.error('Could not record the outcome of job %s (%s)', job.pk, job.task, exc_info=exc)
+
+
+def work(threads, batch, poll, once, stop):
+    """Claim and run jobs on a pool of `threads` until `stop` is set.
+
+    With `once`, return as soon as the queue has no due jobs left.
+    """
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    in_flight = set()
+    last_housekeeping = 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job') as pool:
+        while not stop.is_set():
+            in_flight = {future for future in in_flight if not future.done()}
+            free = threads - len(in_flight)
+            try:
+                if time.monotonic() - last_housekeeping > HOUSEKEEPING_INTERVAL:
+                    queue.requeue_stale()
+                    queue.purge()
+                    last_housekeeping = time.monotonic()
+                # pool saturated: claim nothing, wait below for a slot to free
+                jobs = queue.claim(worker_id, min(batch, free)) if free else []
+            except DatabaseError:
+                # e.g. "database is locked" on SQLite: transient, keep the worker alive
+                logger.exception('Job queue unavailable, retrying in %s s', poll)
+                close_old_connections()
+                stop.wait(poll)
+                continue
+
+            if not free:
+                wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+                continue
+            for job in jobs:
+                future = pool.submit(_run_job, job)
+                future.add_done_callback(partial(_job_finished, job))
+                in_flight.add(future)
+            if jobs:
+                continue
+            if once and not in_flight:
+                break
+            stop.wait(poll)
+    close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (no external broker, the database is the queue).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to fork.')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per worker process.')
+        parser.add_argument('--batch', type=int, default=10, help='Maximum jobs claimed at once.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to sleep when idle.')
+        parser.add_argument('--once', action='store_true', help='Exit when no due jobs are left.')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        if options['processes'] < 1 or options['threads'] < 1 or options['batch'] < 1:
+            raise CommandError('--processes, --threads and --batch must be at least 1.')
+
+        stop = threading.Event()
+        work_args = (options['threads'], options['batch'], options['poll'], options['once'])
+        if options['processes'] == 1:
+            self._handle_signals(stop)
+            work(*work_args, stop)
+            return
+
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            raise CommandError('--processes > 1 requires a platform that supports fork().')
+        # connections must not be shared with the forked children
+        connections.close_all()
+        children = [
+            context.Process(target=self._child, args=(work_args,), daemon=False)
+            for _ in range(options['processes'])
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(f"Started {len(children)} worker processes.")
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    os.kill(child.pid, signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+
+    def _child(self, work_args):
+        stop = threading.Event()
+        self._handle_signals(stop)
+        work(*work_args, stop)
+
+    @staticmethod
+    def _handle_signals(stop):
+        # finish in-flight jobs on SIGTERM/SIGINT instead of dying mid-job
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
@@ -0,0 +1,136 @@
+"""Database-backed job queue.
+
+Producers call `enqueue`; workers (`manage.py run_workers`) repeatedly `claim` a
+batch of due jobs and `run` them. No external broker is involved: the `Job`
+table is the queue.
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` on backends that support
+it, so concurrent workers never wait on each other's rows. On SQLite, which
+serializes writers, a single conditional ``UPDATE ... WHERE id IN (SELECT ...
+LIMIT n) AND status = 'queued'`` statement is used instead: only one worker can
+flip a given row from queued to running.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task_name, payload=None, *, dedupe_key=None, delay=0, max_attempts=5):
+    """Queue `task_name` to be called with `payload` as keyword arguments.
+
+    When `dedupe_key` is given and a queued job with the same key already exists,
+    no new job is created and the existing one is returned. `delay` postpones the
+    first attempt by that many seconds.
+    """
+    fields = {
+        'task': task_name,
+        'payload': payload or {},
+        'run_at': timezone.now() + timedelta(seconds=delay),
+        'max_attempts': max_attempts,
+    }
+    if dedupe_key is None:
+        return Job.objects.create(**fields)
+
+    existing = Job.objects.filter(dedupe_key=dedupe_key, status=Job.QUEUED).first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(dedupe_key=dedupe_key, **fields)
+    except IntegrityError:
+        # another producer queued the same key between our check and insert
+        return Job.objects.get(dedupe_key=dedupe_key, status=Job.QUEUED)
+
+
+def claim(worker_id, limit):
+    """Atomically mark up to `limit` due jobs as running for `worker_id` and return them."""
+    now = timezone.now()
+    token = f'{worker_id}/{uuid.uuid4().hex[:12]}'
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'pk')
+    changes = {
+        'status': Job.RUNNING,
+        'claimed_by': token,
+        'claimed_at': now,
+        'attempts': F('attempts') + 1,
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            Job.objects.filter(pk__in=ids).update(**changes)
+    else:
+        Job.objects.filter(pk__in=due.values('pk')[:limit], status=Job.QUEUED).update(**changes)
+    return list(Job.objects.filter(claimed_by=token, status=Job.RUNNING).order_by('run_at', 'pk'))
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a job that has failed `attempts` times."""
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', 2)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'JOBS_RETRY_BACKOFF_MAX', 3600))
+    # a little jitter keeps jobs that failed together from retrying in lockstep
+    return delay * random.uniform(1, 1.1)
+
+
+def run(job):
+    """Run a claimed job, then record success, schedule a retry or mark it failed."""
+    try:
+        get_task(job.task)(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            logger.error('Job %s (%s) failed permanently', job.pk, job.task)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning('Job %s (%s) failed, retrying at %s', job.pk, job.task, job.run_at)
+    else:
+        job.status = Job.DONE
+        job.last_error = ''
+    try:
+        with transaction.atomic():
+            job.save(update_fields=['status', 'run_at', 'last_error', 'updated'])
+    except IntegrityError:
+        # an identical job was queued while this one was running: that one does the
+        # retry, and this attempt stays recorded as failed
+        job.status = Job.FAILED
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=job.last_error)
+    return job
+
+
+def requeue_stale():
+    """Put back jobs whose worker disappeared (running for longer than the lease)."""
+    lease = getattr(settings, 'JOBS_LEASE_SECONDS', 600)
+    cutoff = timezone.now() - timedelta(seconds=lease)
+    stale = Job.objects.filter(status=Job.RUNNING, claimed_at__lt=cutoff)
+    requeued = 0
+    for job in stale:
+        job.status = Job.QUEUED if job.attempts < job.max_attempts else Job.FAILED
+        job.last_error = job.last_error or 'Worker lease expired.'
+        try:
+            with transaction.atomic():
+                job.save(update_fields=['status', 'last_error', 'updated'])
+        except IntegrityError:
+            # an identical job is already queued and will do the work
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=job.last_error)
+        requeued += 1
+    return requeued
+
+
+def purge(days=None):
+    """Delete finished jobs older than `days` (JOBS_KEEP_DAYS by default)."""
+    days = getattr(settings, 'JOBS_KEEP_DAYS', 7) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.DONE, updated__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,32 @@
+"""Registry of callables that can be run as background jobs.
+
+Task functions are registered with the `task` decorator, usually in a
+`<app>/tasks.py` module (those modules are imported by `run_workers`)::
+
+    @task
+    def process_book_cover(book_id):
+        ...
+
+A task is referenced by name when queued; the default name is the dotted path
+of the function, e.g. ``reviews.tasks.process_book_cover``.
+"""
+_tasks = {}
+
+
+def task(func=None, *, name=None):
+    """Register `func` as a background task, optionally under an explicit `name`."""
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__qualname__}'
+        _tasks[func.task_name] = func
+        return func
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def get_task(name):
+    """Return the callable registered as `name`, raising LookupError if unknown."""
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f'No background task registered as {name!r}') from None
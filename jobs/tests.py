@@ -0,0 +1,156 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError, OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .management.commands.run_workers import work
+from .models import Job
+from .registry import task
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+class EnqueueTests(TestCase):
+    def test_duplicate_enqueue_returns_the_queued_job(self):
+        first = queue.enqueue('jobs.tests.record', {'value': 1}, dedupe_key='k')
+        second = queue.enqueue('jobs.tests.record', {'value': 2}, dedupe_key='k')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_dedupe_key_is_free_again_once_the_job_left_the_queue(self):
+        first = queue.enqueue('jobs.tests.record', {'value': 1}, dedupe_key='k')
+        queue.claim('w1', 10)
+        second = queue.enqueue('jobs.tests.record', {'value': 1}, dedupe_key='k')
+        self.assertNotEqual(first.pk, second.pk)
+
+
+class ClaimTests(TestCase):
+    def test_job_is_claimed_exactly_once(self):
+        job = queue.enqueue('jobs.tests.record', {'value': 1})
+        claimed = queue.claim('w1', 10)
+        self.assertEqual([j.pk for j in claimed], [job.pk])
+        self.assertEqual(claimed[0].status, Job.RUNNING)
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(queue.claim('w2', 10), [])
+
+    def test_jobs_not_yet_due_are_not_claimed(self):
+        queue.enqueue('jobs.tests.record', {'value': 1}, delay=60)
+        self.assertEqual(queue.claim('w1', 10), [])
+
+    def test_claim_respects_limit(self):
+        for value in range(3):
+            queue.enqueue('jobs.tests.record', {'value': value})
+        self.assertEqual(len(queue.claim('w1', 2)), 2)
+        self.assertEqual(len(queue.claim('w2', 2)), 1)
+
+
+@override_settings(JOBS_RETRY_BACKOFF=10)
+class RunTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_successful_job_is_done(self):
+        queue.enqueue('jobs.tests.record', {'value': 7})
+        job = queue.run(queue.claim('w1', 1)[0])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(calls, [7])
+
+    def test_failing_job_is_retried_with_backoff_then_failed(self):
+        queue.enqueue('jobs.tests.fail', max_attempts=2)
+        before = timezone.now()
+        job = queue.run(queue.claim('w1', 1)[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        job = queue.run(queue.claim('w1', 1)[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_failed_retry_superseded_by_a_queued_duplicate_is_marked_failed(self):
+        queue.enqueue('jobs.tests.fail', dedupe_key='k')
+        running = queue.claim('w1', 1)[0]
+        duplicate = queue.enqueue('jobs.tests.fail', dedupe_key='k')
+        queue.run(running)
+        running.refresh_from_db()
+        self.assertEqual(running.status, Job.FAILED)
+        self.assertIn('RuntimeError', running.last_error)
+        self.assertEqual(Job.objects.get(pk=duplicate.pk).status, Job.QUEUED)
+
+    def test_backoff_grows_and_is_capped(self):
+        with override_settings(JOBS_RETRY_BACKOFF=2, JOBS_RETRY_BACKOFF_MAX=30):
+            self.assertTrue(2 <= queue.backoff(1) <= 2.2)
+            self.assertTrue(8 <= queue.backoff(3) <= 8.8)
+            self.assertTrue(30 <= queue.backoff(10) <= 33)
+
+
+@override_settings(JOBS_LEASE_SECONDS=60)
+class RequeueStaleTests(TestCase):
+    def test_abandoned_jobs_are_requeued(self):
+        queue.enqueue('jobs.tests.record', {'value': 1})
+        job = queue.claim('w1', 1)[0]
+        self.assertEqual(queue.requeue_stale(), 0)
+        Job.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.QUEUED)
+
+    def test_abandoned_jobs_out_of_attempts_are_failed(self):
+        queue.enqueue('jobs.tests.record', {'value': 1}, max_attempts=1)
+        job = queue.claim('w1', 1)[0]
+        Job.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(seconds=120))
+        queue.requeue_stale()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+
+
+class WorkTests(TransactionTestCase):
+    """The worker loop survives database errors and logs jobs it could not record."""
+
+    def setUp(self):
+        calls.clear()
+
+    def work(self):
+        work(threads=2, batch=10, poll=0.01, once=True, stop=threading.Event())
+
+    def test_transient_database_errors_do_not_stop_the_worker(self):
+        queue.enqueue('jobs.tests.record', {'value': 1})
+        with mock.patch.object(queue, 'claim', side_effect=self.flaky(queue.claim)), \
+                self.assertLogs('jobs', 'ERROR') as logs:
+            self.work()
+        self.assertEqual(calls, [1])
+        self.assertIn('database is locked', logs.output[0])
+
+    @staticmethod
+    def flaky(func):
+        """`func`, failing on its first call."""
+        failures = [OperationalError('database is locked')]
+
+        def call(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return func(*args, **kwargs)
+        return call
+
+    def test_jobs_whose_outcome_cannot_be_saved_are_logged(self):
+        job = queue.enqueue('jobs.tests.record', {'value': 1})
+        with mock.patch.object(queue, 'run', side_effect=DatabaseError('disk I/O error')), \
+                self.assertLogs('jobs', 'ERROR') as logs:
+            self.work()
+        self.assertIn(f'job {job.pk} (jobs.tests.record)', logs.output[0])
+        self.assertIn('disk I/O error', logs.output[0])
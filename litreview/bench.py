@@ -0,0 +1,46 @@
+"""Small benchmarking harness used by `manage.py benchmark`.
+
+Scenarios live in `<app>/benchmarks.py` modules and register themselves with the
+`scenario` decorator. A scenario receives the number of repetitions and returns a
+list of `(label, stats)` rows, where `stats` is a dict as returned by `measure`
+(extra keys are allowed and printed as-is).
+"""
+import time
+from statistics import median
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Register the decorated function as benchmark scenario `name`."""
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+def measure(func, repeat=20, setup=None):
+    """Call `func` `repeat` times and return latency and query statistics.
+
+    `setup`, when given, is called before each repetition and is not measured.
+    The returned dict holds `median_ms`, `min_ms` and `queries` (the largest
+    number of queries issued by a single call).
+    """
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        queries = max(queries, len(ctx.captured_queries))
+    return {
+        'median_ms': round(median(timings) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'queries': queries,
+    }
@@ -0,0 +1,87 @@
+"""Import-time profiler for worker cold starts.
+
+Run as ``python -m litreview.importtime MODULE [MODULE ...]``: imports each module
+in a fresh interpreter and prints a JSON list of ``[name, depth, self_us,
+cumulative_us]`` records (in import order) on stdout. `run` does this in a
+subprocess and returns the records; `manage.py profile_imports` formats them.
+
+This is ``python -X importtime`` done in Python: ``-X importtime`` only reports
+``import`` statements, while Django loads apps, models and URLconfs through
+``importlib.import_module``, which bypasses it. Hooking ``_find_and_load`` sees
+both.
+"""
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+# Import time (milliseconds) the project may add to a fresh process on top of
+# importing Django's own WSGI handler (`BASELINE_MODULES`). Measuring against that
+# baseline keeps the check meaningful on slower machines; CI can still override
+# it with LITREVIEW_COLD_START_BUDGET_MS.
+COLD_START_BUDGET_MS = float(os.environ.get('LITREVIEW_COLD_START_BUDGET_MS', 500))
+BASELINE_MODULES = ['django.core.wsgi']
+
+
+def profile(modules):
+    """Import `modules` and return a record for every module loaded on the way."""
+    from importlib import _bootstrap
+
+    records = []
+    children = []  # cumulative time of the direct children of each open import
+    original = _bootstrap._find_and_load
+
+    def timed_find_and_load(name, import_):
+        if name in sys.modules:
+            return original(name, import_)
+        index = len(records)
+        records.append(None)
+        children.append(0)
+        start = time.perf_counter_ns()
+        try:
+            module = original(name, import_)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            nested = children.pop()
+            if children:
+                children[-1] += elapsed
+        # only reached on success: failed probes (e.g. "app.apps.Config") are not modules
+        records[index] = (name, len(children), (elapsed - nested) // 1000, elapsed // 1000)
+        return module
+
+    _bootstrap._find_and_load = timed_find_and_load
+    try:
+        for module in modules:
+            importlib.import_module(module)
+    finally:
+        _bootstrap._find_and_load = original
+    return [record for record in records if record is not None]
+
+
+def total_ms(records):
+    """Wall time, in milliseconds, of the top-level imports in `records`."""
+    return sum(cumulative for _, depth, _, cumulative in records if depth == 0) / 1000
+
+
+def run(modules, python=sys.executable, env=None):
+    """Profile importing `modules` in a fresh interpreter and return the records."""
+    # imported here so the profiled interpreter does not pay for them up front
+    import json
+    import subprocess
+
+    result = subprocess.run(
+        [python, '-m', 'litreview.importtime', *modules],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True,
+    )
+    return [tuple(record) for record in json.loads(result.stdout)]
+
+
+if __name__ == '__main__':
+    import json
+
+    json.dump(profile(sys.argv[1:]), sys.stdout)
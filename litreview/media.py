@@ -0,0 +1,174 @@
+"""Storage and serving of user-uploaded media (book covers).
+
+`HashedMediaStorage` gives every file a content-versioned URL,
+``MEDIA_URL + '_v/<hash>/<name>'``, so a URL never points at different bytes
+and can be cached forever by browsers and CDNs. `serve` answers those URLs (and
+plain unversioned ones) with ETag / If-None-Match and single-range Range
+support, and hands the byte streaming to the front proxy when configured:
+
+- ``MEDIA_X_ACCEL_REDIRECT`` (nginx): internal location prefix, e.g.
+  ``'/protected-media/'``; the response carries ``X-Accel-Redirect`` and no body.
+- ``MEDIA_X_SENDFILE`` (Apache mod_xsendfile, lighttpd): when true, the response
+  carries ``X-Sendfile`` with the absolute path and no body (percent-encoded,
+  which mod_xsendfile decodes by default, see ``XSendFileUnescape``).
+
+Otherwise the file is returned as a `FileResponse`, which WSGI servers such as
+gunicorn send with ``sendfile()`` through ``wsgi.file_wrapper``.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+VERSION_PREFIX = '_v/'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=3600'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@lru_cache(maxsize=4096)
+def _file_hash(path, mtime_ns, size):
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def file_version(path):
+    """Content hash of the file at `path` (memoized per mtime/size), or None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _file_hash(path, stat.st_mtime_ns, stat.st_size)
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage whose URLs embed a hash of the file's content."""
+
+    def url(self, name):
+        url = super().url(name)
+        version = file_version(self.path(name)) if name else None
+        if version is None:
+            return url
+        return url.replace(self.base_url, f'{self.base_url}{VERSION_PREFIX}{version}/', 1)
+
+
+class _RangeFile:
+    """Read-only view of `length` bytes of an open file, starting at its position."""
+
+    def __init__(self, fh, length):
+        self.fh = fh
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def _parse_range(header, size):
+    """Return `(start, end)` for a single satisfiable byte range, None to ignore the header.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # an invalid range-spec makes the whole header ignored (RFC 9110, 14.2)
+        return None
+    if first:
+        start, end = int(first), int(last) if last else size - 1
+    else:
+        # suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    end = min(end, size - 1)
+    if start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+@require_safe
+def serve(request, path, version=None):
+    """Serve the media file at `path`, optionally requested through a versioned URL."""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('File not found')
+
+    current = _file_hash(fullpath, stat.st_mtime_ns, stat.st_size)
+    etag = f'"{current}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        # a stale versioned URL still gets the current file, but must not be cached forever
+        'Cache-Control': IMMUTABLE if version == current else REVALIDATE,
+    }
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in if_none_match or if_none_match.strip() == '*':
+        return HttpResponseNotModified(headers=headers)
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    accel_prefix = getattr(settings, 'MEDIA_X_ACCEL_REDIRECT', None)
+    if accel_prefix:
+        # the proxy also handles Range requests for internal redirects
+        # header values must be ASCII: percent-encode, as the proxies decode them
+        headers['X-Accel-Redirect'] = quote(accel_prefix.rstrip('/') + '/' + path.lstrip('/'))
+        return HttpResponse(content_type=content_type, headers=headers)
+    if getattr(settings, 'MEDIA_X_SENDFILE', False):
+        headers['X-Sendfile'] = quote(fullpath)
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and stat.st_size and (if_range is None or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            headers['Content-Range'] = f'bytes */{stat.st_size}'
+            return HttpResponse(status=416, headers=headers)
+
+    fh = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(fh, content_type=content_type)
+    else:
+        start, end = byte_range
+        fh.seek(start)
+        if end == stat.st_size - 1:
+            # to the end of the file: keep the real file object so the WSGI
+            # server can still use sendfile() from the current offset
+            response = FileResponse(fh, content_type=content_type, status=206)
+        else:
+            response = FileResponse(_RangeFile(fh, end - start + 1), content_type=content_type, status=206)
+        response.headers['Content-Length'] = str(end - start + 1)
+        headers['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    for header, value in headers.items():
+        response.headers[header] = value
+    return response
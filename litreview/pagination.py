@@ -0,0 +1,57 @@
+"""Pagination helpers for very large tables (used by the admin changelists)."""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+# below this many (estimated) rows an exact COUNT(*) is cheap enough
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimate_count(model, using='default'):
+    """Return a cheap estimate of the number of rows of `model`'s table, or None.
+
+    - PostgreSQL: the planner statistics (`pg_class.reltuples`, kept up to date by
+      autovacuum/ANALYZE).
+    - MySQL: `information_schema.tables.table_rows`.
+    - SQLite: the largest primary key, read from the index. It over-counts by the
+      number of deleted rows, so the last changelist pages may be empty.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+        # -1 (0 before PostgreSQL 14) means the table was never analyzed
+        return int(row[0]) if row and row[0] > 0 else None
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] else None
+    if connection.vendor == 'sqlite' and model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+        return model._default_manager.using(using).aggregate(last=Max('pk'))['last'] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the size of large, unfiltered querysets.
+
+    Filtered querysets (search, list filters) and small tables are counted
+    exactly; an unfiltered queryset over a table estimated at
+    `ESTIMATE_THRESHOLD` rows or more uses `estimate_count` instead of COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
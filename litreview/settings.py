@@ -10,7 +10,6 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
-from dotenv import load_dotenv
 import os
 from pathlib import Path
 
@@ -22,13 +21,16 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/4.0/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-load_dotenv(os.path.join(BASE_DIR / '.env'))
+# python-dotenv is only imported when there is a .env file to read
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True').lower() in ('1', 'true', 'yes')
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -36,6 +38,9 @@ ALLOWED_HOSTS = []
 INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'reviews.apps.ReviewsConfig',
+    'jobs.apps.JobsConfig',
+    'trending.apps.TrendingConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -50,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'litreview.throttling.ThrottleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,6 +92,39 @@ DATABASES = {
 }
 
 
+# Cache
+# The default in-process cache is private to each worker process, so sessions and
+# users are only served from the cache when a shared cache is configured (e.g.
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache): otherwise a
+# logout or deactivation handled by one worker would not be seen by the others.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+# Sessions and messages
+# With a shared cache, sessions are read from the cache and only hit the database
+# on a cache miss ('django.contrib.sessions.backends.signed_cookies' avoids
+# server-side storage entirely). Flash messages travel in a signed cookie, so they
+# never cause a session write. `users.checks` rejects cache-backed sessions on a
+# per-process cache when DEBUG is off.
+
+SESSION_ENGINE = os.getenv(
+    'DJANGO_SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -106,6 +145,36 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = "users.User"
 
+# `request.user` is loaded through the cache instead of a query on every request.
+# ModelBackend stays listed so sessions created before CachedModelBackend existed
+# remain valid.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = 300 if SHARED_CACHE else 0  # seconds; 0 disables the user cache
+
+# Rate limiting and load shedding (see litreview/throttling.py)
+# Token-bucket rates per URL name, applied per user (per client IP when anonymous).
+# LocalBackend limits each worker process on its own; with several processes use
+# 'litreview.throttling.CacheBackend' on a shared cache.
+THROTTLE_BACKEND = os.getenv('DJANGO_THROTTLE_BACKEND', 'litreview.throttling.LocalBackend')
+THROTTLE_RATES = {
+    'reviews:book_search': '30/m',
+    'users:search': '30/m',
+    'users:follow': '60/m',
+    'reviews:create_book': '20/m',
+}
+# shed first (503) when more than THROTTLE_MAX_IN_FLIGHT requests are in progress,
+# across all processes: shedding only applies with the CacheBackend on a SHARED_CACHE
+THROTTLE_LOW_PRIORITY = ['reviews:book_search', 'users:search', 'trending:week', 'trending:week_json']
+THROTTLE_MAX_IN_FLIGHT = int(os.getenv('DJANGO_THROTTLE_MAX_IN_FLIGHT', '64'))
+# number of proxies appending to X-Forwarded-For in front of Django (0: use REMOTE_ADDR)
+THROTTLE_PROXY_COUNT = int(os.getenv('DJANGO_THROTTLE_PROXY_COUNT', '0'))
+
+# addresses allowed to read /metrics/throttling/
+INTERNAL_IPS = [ip for ip in os.getenv('DJANGO_INTERNAL_IPS', '127.0.0.1,::1').split(',') if ip]
+
 LOGIN_URL = '/users/login/'
 
 LOGIN_REDIRECT_URL = '/'
@@ -129,12 +198,46 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# `collectstatic` target, served by litreview.staticfiles.StaticFilesMiddleware
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Media files (user-uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Covers get content-hashed, cacheable-forever URLs (see litreview/media.py).
+# In production let the front proxy send the bytes: set DJANGO_MEDIA_X_ACCEL_REDIRECT
+# to an nginx `internal` location aliased to MEDIA_ROOT (e.g. /protected-media/),
+# or DJANGO_MEDIA_X_SENDFILE=1 for Apache mod_xsendfile / lighttpd.
+MEDIA_X_ACCEL_REDIRECT = os.getenv('DJANGO_MEDIA_X_ACCEL_REDIRECT')
+MEDIA_X_SENDFILE = os.getenv('DJANGO_MEDIA_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'litreview.media.HashedMediaStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Production static profile: `collectstatic` writes content-hashed, pre-compressed
+# (gzip, plus brotli when installed) files that the middleware serves with
+# Content-Encoding negotiation and immutable caching. DEBUG keeps serving
+# STATICFILES_DIRS as they are edited.
+if not DEBUG:
+    STORAGES['staticfiles']['BACKEND'] = 'litreview.staticfiles.CompressedManifestStaticFilesStorage'
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'litreview.staticfiles.StaticFilesMiddleware')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Background jobs (run with `python manage.py run_workers`)
+
+JOBS_RETRY_BACKOFF = 2  # seconds before the first retry, doubled on each failed attempt
+JOBS_RETRY_BACKOFF_MAX = 3600
+JOBS_LEASE_SECONDS = 600  # running jobs older than this are assumed abandoned and requeued
+JOBS_KEEP_DAYS = 7  # finished jobs are purged after this many days
@@ -0,0 +1,168 @@
+"""Production static files: fingerprinted, pre-compressed and served with far-future caching.
+
+`CompressedManifestStaticFilesStorage` is Django's manifest storage (content-hashed
+names such as ``css/site.3f2a9c1e7b0d.css``) that also writes ``.gz`` and, when the
+optional ``brotli`` package is installed, ``.br`` variants of text assets at
+``collectstatic`` time, so nothing is compressed per request.
+
+`StaticFilesMiddleware` is a small stand-in for WhiteNoise: it serves
+``STATIC_ROOT`` under ``STATIC_URL`` from the WSGI process, picks the best variant
+the client accepts (``Content-Encoding: br`` / ``gzip``), and marks hashed names
+``immutable`` so browsers never request them again. Unhashed names must be
+revalidated (``no-cache``) and get a 304 when unchanged.
+"""
+import gzip
+import json
+import mimetypes
+import os
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+# extensions worth compressing; images and fonts are already compressed
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico')
+# smaller files do not gain enough to pay for the extra variant
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# (Content-Encoding, file suffix, compress function), in order of preference
+ENCODINGS = [('gzip', '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+if brotli is not None:
+    ENCODINGS.insert(0, ('br', '.br', lambda data: brotli.compress(data, quality=11)))
+
+
+def compress_file(path):
+    """Write the compressed variants of `path` that are smaller than it; return their paths."""
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    written = []
+    for _, suffix, compress in ENCODINGS:
+        compressed = compress(data)
+        # keep a variant only if it saves at least 5%
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as fh:
+                fh.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also pre-compresses collected text assets."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # both the original and the hashed copy are collected and may be requested
+        for name in {*paths, *self.hashed_files.values()}:
+            if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+                continue
+            if self.size(name) >= MIN_COMPRESS_SIZE:
+                compress_file(self.path(name))
+
+
+class StaticAsset:
+    """A file under STATIC_ROOT and its pre-compressed variants."""
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.cache_control = IMMUTABLE if immutable else REVALIDATE
+        self.etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+        self.variants = {
+            encoding: path + suffix
+            for encoding, suffix, _ in ENCODINGS
+            if os.path.isfile(path + suffix)
+        }
+
+
+def accepted_encodings(header):
+    """Return the content codings accepted by an Accept-Encoding `header` value."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Serve collected static files before the rest of the middleware stack runs.
+
+    STATIC_ROOT is scanned once at startup (run ``collectstatic`` before starting
+    the workers); requests for other paths pass straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed('STATIC_ROOT has not been collected.')
+        self.prefix = urlsplit(settings.STATIC_URL).path
+        self.files = self.scan(str(root))
+
+    @staticmethod
+    def scan(root):
+        hashed = set()
+        manifest = os.path.join(root, ManifestStaticFilesStorage.manifest_name)
+        if os.path.isfile(manifest):
+            with open(manifest, encoding='utf-8') as fh:
+                hashed = set(json.load(fh).get('paths', {}).values())
+        suffixes = tuple(suffix for _, suffix, _ in ENCODINGS)
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if filename.endswith(suffixes) and os.path.isfile(path.rsplit('.', 1)[0]):
+                    continue  # a variant, served through its original's entry
+                files[name] = StaticAsset(path, immutable=name in hashed)
+        return files
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            asset = self.files.get(request.path_info[len(self.prefix):])
+            if asset is not None:
+                return self.serve(request, asset)
+        return self.get_response(request)
+
+    def serve(self, request, asset):
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding = next((encoding for encoding in asset.variants if encoding in accepted), None)
+        headers = {
+            # each representation needs its own validator
+            'ETag': f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"',
+            'Cache-Control': asset.cache_control,
+        }
+        if asset.variants:
+            headers['Vary'] = 'Accept-Encoding'
+        if headers['ETag'] in request.headers.get('If-None-Match', ''):
+            return HttpResponseNotModified(headers=headers)
+
+        path = asset.variants[encoding] if encoding else asset.path
+        response = FileResponse(open(path, 'rb'), content_type=asset.content_type)
+        # FileResponse names the file it was given (possibly a .gz variant): assets
+        # are displayed or loaded by the page, not downloaded
+        del response.headers['Content-Disposition']
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        for header, value in headers.items():
+            response.headers[header] = value
+        return response
@@ -0,0 +1,279 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from litreview import importtime
+from litreview.media import _parse_range, file_version
+from litreview.staticfiles import IMMUTABLE, REVALIDATE, StaticFilesMiddleware, accepted_encodings
+from litreview.throttling import CacheBackend, ThrottleMiddleware, parse_rate, take_token
+
+
+class ColdStartTests(SimpleTestCase):
+    """Importing the WSGI application is paid by every new worker: keep it cheap."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.records = importtime.run(['litreview.wsgi'])
+        cls.baseline = importtime.run(importtime.BASELINE_MODULES)
+
+    def test_wsgi_import_within_budget(self):
+        overhead_ms = importtime.total_ms(self.records) - importtime.total_ms(self.baseline)
+        self.assertLess(
+            overhead_ms, importtime.COLD_START_BUDGET_MS,
+            'Importing litreview.wsgi costs too much on top of Django itself; '
+            'see `manage.py profile_imports`.',
+        )
+
+    def test_image_libraries_are_imported_lazily(self):
+        loaded = {name.split('.')[0] for name, *_ in self.records}
+        self.assertNotIn('PIL', loaded, 'Pillow must only be imported on first use.')
+
+
+class ParseRangeTests(SimpleTestCase):
+    size = 100
+
+    def test_closed_range(self):
+        self.assertEqual(_parse_range('bytes=0-9', self.size), (0, 9))
+        self.assertEqual(_parse_range('bytes=10-10', self.size), (10, 10))
+
+    def test_end_is_clamped_to_the_file(self):
+        self.assertEqual(_parse_range('bytes=90-500', self.size), (90, 99))
+
+    def test_open_ended(self):
+        self.assertEqual(_parse_range('bytes=40-', self.size), (40, 99))
+
+    def test_suffix(self):
+        self.assertEqual(_parse_range('bytes=-10', self.size), (90, 99))
+        self.assertEqual(_parse_range('bytes=-500', self.size), (0, 99))
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=100-', 'bytes=100-200', 'bytes=-0'):
+            with self.subTest(header=header), self.assertRaises(ValueError):
+                _parse_range(header, self.size)
+
+    def test_ignored(self):
+        for header in ('bytes=5-3', 'bytes=0-1,5-6', 'bytes=-', 'items=0-9', 'bytes=a-b'):
+            with self.subTest(header=header):
+                self.assertIsNone(_parse_range(header, self.size))
+
+
+class ServeMediaTests(SimpleTestCase):
+    name = '\u041c\u0430\u0441\u0442\u0435\u0440.jpg'
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.path = os.path.join(self.media_root, self.name)
+        with open(self.path, 'wb') as fh:
+            fh.write(b'0123456789')
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.url = reverse('media', kwargs={'path': self.name})
+
+    def test_versioned_url(self):
+        url = reverse('media', kwargs={'version': file_version(self.path), 'path': self.name})
+        response = self.client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+
+    def test_range(self):
+        response = self.client.get(self.url, headers={'range': 'bytes=2-4'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(response.headers['Content-Range'], 'bytes 2-4/10')
+
+    def test_x_accel_redirect_is_percent_encoded(self):
+        with self.settings(MEDIA_X_ACCEL_REDIRECT='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.headers['X-Accel-Redirect'], '/protected-media/' + quote(self.name))
+
+    def test_x_sendfile_is_percent_encoded(self):
+        with self.settings(MEDIA_X_SENDFILE=True):
+            response = self.client.get(self.url)
+        self.assertEqual(response.headers['X-Sendfile'], quote(self.path))
+        self.assertTrue(response.headers['X-Sendfile'].isascii())
+
+    def test_unsafe_methods_are_refused(self):
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+        self.assertEqual(self.client.head(self.url).status_code, 200)
+
+
+class ParseRateTests(SimpleTestCase):
+    def test_rates(self):
+        self.assertEqual(parse_rate('30/m'), (30, 60))
+        self.assertEqual(parse_rate('5/10s'), (5, 10))
+        self.assertEqual(parse_rate('1000/d'), (1000, 86400))
+
+    def test_invalid(self):
+        for rate in ('30', '30/', '30/y', 'x/m', '30/xm', '-1/m'):
+            with self.subTest(rate=rate), self.assertRaises(ValueError):
+                parse_rate(rate)
+
+
+class TakeTokenTests(SimpleTestCase):
+    def test_new_bucket_is_full(self):
+        self.assertEqual(take_token(None, 10, 60, 100.0), ((9, 100.0), 0))
+
+    def test_empty_bucket_waits_for_one_token(self):
+        state, wait = take_token((0, 100.0), 10, 60, 100.0)
+        self.assertEqual(state, (0, 100.0))
+        self.assertEqual(wait, 6)
+
+    def test_refill(self):
+        state, wait = take_token((0, 100.0), 10, 60, 106.0)
+        self.assertEqual(wait, 0)
+        self.assertAlmostEqual(state[0], 0)
+        # never above capacity, however long the bucket was left alone
+        self.assertEqual(take_token((0, 100.0), 10, 60, 10000.0)[0][0], 9)
+
+
+@override_settings(THROTTLE_RATES={'reviews:book_search': '2/m'})
+class ThrottleMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rate_limited(self):
+        url = reverse('reviews:book_search')
+        for _ in range(2):
+            self.assertNotEqual(self.client.get(url).status_code, 429)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+
+    @override_settings(
+        THROTTLE_BACKEND='litreview.throttling.CacheBackend', THROTTLE_MAX_IN_FLIGHT=4, SHARED_CACHE=True,
+    )
+    def test_low_priority_views_shed_under_overload(self):
+        backend = CacheBackend()
+        key = backend.slot_key(int(time.time() // backend.in_flight_slot))
+        cache.set(key, 4)
+        response = self.client.get(reverse('users:search'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertNotEqual(self.client.get(reverse('reviews:all_books')).status_code, 503)
+        # the count is back to where it was once the requests are done
+        self.assertEqual(cache.get(key), 4)
+
+    @override_settings(THROTTLE_MAX_IN_FLIGHT=4)
+    def test_no_shedding_on_a_per_process_count(self):
+        self.assertIsNone(ThrottleMiddleware(lambda request: None).max_in_flight)
+        with self.settings(THROTTLE_BACKEND='litreview.throttling.CacheBackend', SHARED_CACHE=False):
+            self.assertIsNone(ThrottleMiddleware(lambda request: None).max_in_flight)
+        with self.settings(THROTTLE_BACKEND='litreview.throttling.CacheBackend', SHARED_CACHE=True):
+            self.assertEqual(ThrottleMiddleware(lambda request: None).max_in_flight, 4)
+
+    def test_cache_count_spans_two_slots_and_expires(self):
+        backend = CacheBackend()
+        with mock.patch('litreview.throttling.time.time', return_value=1000 * backend.in_flight_slot):
+            count, token = backend.enter()
+            self.assertEqual(count, 1)
+        with mock.patch('litreview.throttling.time.time', return_value=1001 * backend.in_flight_slot):
+            # a request still running from the previous slot is counted
+            self.assertEqual(backend.enter()[0], 2)
+            backend.exit(token)
+            self.assertEqual(backend.enter()[0], 2)
+        # older slots, where a killed worker may have leaked increments, are not (and expire)
+        with mock.patch('litreview.throttling.time.time', return_value=1003 * backend.in_flight_slot):
+            self.assertEqual(backend.enter()[0], 1)
+
+    @override_settings(THROTTLE_PROXY_COUNT=1, INTERNAL_IPS=['127.0.0.1'])
+    def test_metrics_use_the_client_address(self):
+        url = reverse('throttle_metrics')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.9').status_code, 403)
+
+
+class AcceptedEncodingsTests(SimpleTestCase):
+    def test_codings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('GZIP;q=0.5, identity'), {'gzip', 'identity'})
+        self.assertEqual(accepted_encodings(''), {''})
+
+    def test_refused_codings(self):
+        self.assertEqual(accepted_encodings('gzip;q=0'), set())
+        self.assertEqual(accepted_encodings('gzip;q=0.0, br;q=1'), {'br'})
+        self.assertEqual(accepted_encodings('gzip;q=nope'), set())
+
+
+class StaticFilesTests(SimpleTestCase):
+    """`collectstatic` with the compressed manifest storage, served by the middleware."""
+
+    css = 'body { color: #333; }\n' * 40
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        source, cls.static_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, source)
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        os.makedirs(os.path.join(source, 'css'))
+        with open(os.path.join(source, 'css', 'site.css'), 'w') as fh:
+            fh.write(cls.css)
+        with open(os.path.join(source, 'css', 'tiny.css'), 'w') as fh:
+            fh.write('p { margin: 0; }\n')
+        settings = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_DIRS=[source],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'litreview.staticfiles.CompressedManifestStaticFilesStorage'},
+            },
+        )
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = next(
+            name for name in os.listdir(os.path.join(cls.static_root, 'css'))
+            if name.startswith('site.') and name.endswith('.css') and name != 'site.css'
+        )
+        cls.middleware = StaticFilesMiddleware(lambda request: HttpResponse('not static'))
+
+    def get(self, name, **headers):
+        return self.middleware(RequestFactory().get(f'/static/css/{name}', headers=headers))
+
+    def test_collectstatic_writes_gzip_variants_of_large_text_files(self):
+        files = set(os.listdir(os.path.join(self.static_root, 'css')))
+        self.assertIn('site.css.gz', files)
+        self.assertIn(f'{self.hashed}.gz', files)
+        self.assertNotIn('tiny.css.gz', files)
+        with gzip.open(os.path.join(self.static_root, 'css', 'site.css.gz'), 'rt') as fh:
+            self.assertEqual(fh.read(), self.css)
+
+    def test_gzip_is_chosen_when_accepted(self):
+        response = self.get(self.hashed, accept_encoding='gzip, deflate')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Content-Type'], 'text/css')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Disposition', response.headers)
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode(), self.css)
+
+    def test_refused_gzip_gets_the_plain_file(self):
+        response = self.get(self.hashed, accept_encoding='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(b''.join(response.streaming_content).decode(), self.css)
+
+    def test_hashed_names_are_immutable(self):
+        self.assertEqual(self.get(self.hashed).headers['Cache-Control'], IMMUTABLE)
+
+    def test_unhashed_names_are_revalidated(self):
+        response = self.get('site.css', accept_encoding='gzip')
+        self.assertEqual(response.headers['Cache-Control'], REVALIDATE)
+        revalidated = self.get('site.css', accept_encoding='gzip', if_none_match=response.headers['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        # the plain and gzip representations have distinct validators
+        self.assertEqual(self.get('site.css', if_none_match=response.headers['ETag']).status_code, 200)
+
+    def test_other_paths_pass_through(self):
+        self.assertEqual(self.get('missing.css').content, b'not static')
@@ -0,0 +1,250 @@
+"""Rate limiting and load shedding, keyed on URL names.
+
+`ThrottleMiddleware` gives each URL name listed in ``THROTTLE_RATES`` a token
+bucket per user (per client IP for anonymous requests). A rate such as
+``'30/m'`` allows bursts of 30 requests and refills 30 tokens a minute; a
+request finding the bucket empty gets a 429 with ``Retry-After``.
+
+Under overload, that is when more than ``THROTTLE_MAX_IN_FLIGHT`` requests are
+being processed at once, the URL names in ``THROTTLE_LOW_PRIORITY`` are shed
+first: they get a 503 with ``Retry-After`` without reaching the view.
+
+Buckets and the in-flight count live in a backend (``THROTTLE_BACKEND``):
+`LocalBackend` keeps them in process memory, so each worker process limits on
+its own; `CacheBackend` keeps them in the default cache, shared by every
+process when that cache is (e.g. Redis). Shedding needs the shared count: a
+sync worker process never has more than one request in flight, so it is disabled
+with `LocalBackend`, and with `CacheBackend` unless ``SHARED_CACHE`` is set.
+
+Counters of allowed, throttled and shed requests are exported by `metrics_view`
+in the Prometheus text format.
+"""
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.module_loading import import_string
+
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Return `(capacity, period_seconds)` for a rate such as ``'30/m'`` or ``'5/10s'``."""
+    count, _, period = rate.partition('/')
+    multiplier, unit = period[:-1], period[-1:]
+    if unit not in RATE_UNITS or not count.isdigit() or not (multiplier or '1').isdigit():
+        raise ValueError(f'Invalid throttle rate: {rate!r}')
+    return int(count), int(multiplier or 1) * RATE_UNITS[unit]
+
+
+def take_token(state, capacity, period, now):
+    """Refill the bucket `state` (`(tokens, timestamp)` or None) and take one token.
+
+    Returns `(new_state, wait)`, where `wait` is 0 when the token was taken and
+    otherwise the number of seconds until one is available.
+    """
+    tokens, stamp = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class LocalBackend:
+    """Buckets and in-flight count held in this process."""
+
+    # whether `enter` counts the requests of every worker process
+    shared = False
+    # buckets kept before fully refilled (hence forgettable) ones are pruned
+    max_buckets = 10000
+
+    def __init__(self):
+        self.buckets = {}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        now = time.monotonic()
+        with self.lock:
+            if len(self.buckets) >= self.max_buckets:
+                self.prune(now)
+            state, wait = take_token(self.buckets.get(key, (None, period))[0], capacity, period, now)
+            self.buckets[key] = (state, period)
+        return wait
+
+    def prune(self, now):
+        # a bucket untouched for a whole period is full again: same as no bucket
+        self.buckets = {
+            key: (state, period) for key, (state, period) in self.buckets.items()
+            if now - state[1] < period
+        }
+
+    def enter(self):
+        """Count a request in; return `(in_flight, token)`, the token being for `exit`."""
+        with self.lock:
+            self.in_flight += 1
+            return self.in_flight, None
+
+    def exit(self, token):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class CacheBackend:
+    """Buckets and in-flight count held in the default cache.
+
+    Bucket updates are a read followed by a write, so concurrent requests for the
+    same key may occasionally both get the last token; the in-flight count uses
+    the cache's atomic `incr`/`decr`.
+
+    The count is split in time slots of `in_flight_slot` seconds: a request is
+    counted in the slot it started in, and the in-flight total is the sum of the
+    current and previous slots. Each slot expires two slots after it started, so
+    increments leaked by a killed worker are forgotten, while a request (assumed
+    shorter than a slot) always decrements the counter it incremented.
+    """
+    in_flight_key = 'throttle:in_flight'
+    in_flight_slot = 300
+
+    @property
+    def shared(self):
+        # a LocMem cache is per process, and so would the count be
+        return getattr(settings, 'SHARED_CACHE', False)
+
+    def slot_key(self, slot):
+        return f'{self.in_flight_key}:{slot}'
+
+    def take(self, key, capacity, period):
+        state, wait = take_token(cache.get(key), capacity, period, time.time())
+        cache.set(key, state, math.ceil(period))
+        return wait
+
+    def enter(self):
+        slot = int(time.time() // self.in_flight_slot)
+        key = self.slot_key(slot)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, 2 * self.in_flight_slot)
+            count = cache.incr(key)
+        return count + (cache.get(self.slot_key(slot - 1)) or 0), key
+
+    def exit(self, key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            # the slot expired: nothing left to correct
+            pass
+
+
+class Metrics:
+    """Per-process request counters, by URL name and outcome."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def count(self, view_name, outcome):
+        with self.lock:
+            self.requests[view_name, outcome] += 1
+
+    def render(self):
+        """The counters in the Prometheus text exposition format."""
+        with self.lock:
+            requests = sorted(self.requests.items())
+            in_flight = self.in_flight
+        lines = [
+            '# HELP litreview_throttle_requests_total Requests to throttled or sheddable views, by outcome.',
+            '# TYPE litreview_throttle_requests_total counter',
+        ]
+        lines += [
+            f'litreview_throttle_requests_total{{view="{view_name}",outcome="{outcome}"}} {value}'
+            for (view_name, outcome), value in requests
+        ]
+        lines += [
+            '# HELP litreview_in_flight_requests Requests being processed when the latest request started.',
+            '# TYPE litreview_in_flight_requests gauge',
+            f'litreview_in_flight_requests {in_flight}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def client_ip(request):
+    """The client address, skipping the `THROTTLE_PROXY_COUNT` proxies in front of Django."""
+    proxies = getattr(settings, 'THROTTLE_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_busy(status, wait):
+    response = HttpResponse(
+        'Too many requests, please retry later.' if status == 429 else 'Server busy, please retry later.',
+        status=status,
+        content_type='text/plain',
+    )
+    response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response
+
+
+class ThrottleMiddleware:
+    """Apply `THROTTLE_RATES` and shed `THROTTLE_LOW_PRIORITY` views under overload.
+
+    Must come after `AuthenticationMiddleware`: buckets are per `request.user`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rates = {name: parse_rate(rate) for name, rate in getattr(settings, 'THROTTLE_RATES', {}).items()}
+        self.low_priority = set(getattr(settings, 'THROTTLE_LOW_PRIORITY', ()))
+        self.backend = import_string(getattr(settings, 'THROTTLE_BACKEND', 'litreview.throttling.LocalBackend'))()
+        # a per-process count would never reach the threshold: only shed on a shared one
+        self.max_in_flight = getattr(settings, 'THROTTLE_MAX_IN_FLIGHT', None) if self.backend.shared else None
+        if not self.rates and not (self.low_priority and self.max_in_flight):
+            raise MiddlewareNotUsed('No throttle rates or sheddable views configured.')
+
+    def __call__(self, request):
+        request._in_flight, token = self.backend.enter()
+        metrics.in_flight = request._in_flight
+        try:
+            return self.get_response(request)
+        finally:
+            self.backend.exit(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if view_name in self.low_priority and self.max_in_flight and request._in_flight > self.max_in_flight:
+            metrics.count(view_name, 'shed')
+            return too_busy(503, 1)
+
+        rate = self.rates.get(view_name)
+        if rate is None:
+            return None
+        if request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{client_ip(request)}'
+        wait = self.backend.take(f'throttle:{view_name}:{ident}', *rate)
+        if wait:
+            metrics.count(view_name, 'throttled')
+            return too_busy(429, wait)
+        metrics.count(view_name, 'allowed')
+        return None
+
+
+def metrics_view(request):
+    """Throttling counters of this process, for monitoring (`INTERNAL_IPS` only)."""
+    if client_ip(request) not in settings.INTERNAL_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4')
@@ -13,16 +13,29 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+
+from litreview import media, throttling
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('users/', include('users.urls', namespace='users')),
+    path('trending/', include('trending.urls', namespace='trending')),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('metrics/throttling/', throttling.metrics_view, name='throttle_metrics'),
     path('', include('reviews.urls', namespace='reviews')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Uploaded media, in development and production alike: `media.serve` sends
+# caching headers and hands the transfer to the front proxy when configured.
+urlpatterns += [
+    re_path(
+        r'^%s(?:%s(?P<version>[0-9a-f]+)/)?(?P<path>.+)$' % (re.escape(settings.MEDIA_URL.lstrip('/')), re.escape(media.VERSION_PREFIX)),
+        media.serve,
+        name='media',
+    ),
+]
@@ -1,6 +1,54 @@
 from django.contrib import admin
 
+from litreview.pagination import EstimatedCountPaginator
+
 from .models import Book, Review
+from .services import ReviewService
+
+
+@admin.register(Book)
+class BookAdmin(admin.ModelAdmin):
+    list_display = ('title', 'created', 'updated')
+    # prefix search can use the index on `title`; a substring search cannot
+    search_fields = ('^title',)
+    ordering = ('-created', '-id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ('headline', 'book', 'user', 'rating', 'created')
+    list_select_related = ('book', 'user')
+    search_fields = ('^book__title', '=user__username')
+    autocomplete_fields = ('book', 'user')
+    ordering = ('-created', '-id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_readonly_fields(self, request, obj=None):
+        # activity is bucketed per book: moving a review would leave the old book's counts behind
+        if obj is not None:
+            return ('book', 'user')
+        return ()
+
+    def save_model(self, request, obj, form, change):
+        # through the service, like the site's own views, so the review events still fire
+        if change:
+            ReviewService(request.user).update_review(obj, previous_rating=form.initial['rating'])
+        else:
+            # the review belongs to the user picked in the form, not to the admin
+            ReviewService(obj.user).create_review(obj.book, obj)
+
+    def get_deleted_objects(self, objs, request):
+        # the confirmation page prints every review, whose __str__ reads its user
+        if hasattr(objs, 'select_related'):
+            objs = objs.select_related('user')
+        return super().get_deleted_objects(objs, request)
+
+    def delete_model(self, request, obj):
+        ReviewService(request.user).delete_review(obj)
 
-admin.site.register(Book)
-admin.site.register(Review)
+    def delete_queryset(self, request, queryset):
+        # one transaction, one DELETE, and the usual review events for the trending buckets
+        ReviewService(request.user).delete_reviews(queryset)
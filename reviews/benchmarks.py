@@ -0,0 +1,191 @@
+"""Benchmark scenarios for the reviews app (see `manage.py benchmark`)."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from litreview.bench import measure, scenario
+
+from .models import Book, Review
+
+
+def seed(books=20, users=5, reviews_per_book=5):
+    """Create sample users, books and reviews; return `(users, books)`."""
+    User = get_user_model()
+    start = User.objects.count()
+    people = User.objects.bulk_create(
+        User(username=f'bench{start + i}', first_name='Bench', last_name=f'User{start + i}')
+        for i in range(users)
+    )
+    shelf = Book.objects.bulk_create(
+        Book(title=f'Benchmark book {i}', description='Lorem ipsum ' * 20, image='Test_image.jpg' if i % 2 else '')
+        for i in range(books)
+    )
+    Review.objects.bulk_create(
+        Review(
+            headline=f'Review {i} of {book.title}',
+            body='Dolor sit amet ' * 30,
+            rating=i % 6,
+            book=book,
+            user=people[i % users],
+        )
+        for book in shelf
+        for i in range(min(reviews_per_book, users))
+    )
+    return people, shelf
+
+
+@scenario('review_writes')
+def review_writes(repeat):
+    """Latency and query count of the review create/edit/delete views."""
+    (author, *_), _ = seed(books=1, users=5, reviews_per_book=0)
+    client = Client()
+    client.force_login(author)
+    state = {}
+
+    def new_book():
+        state['book'] = Book.objects.create(title='Fresh book')
+
+    def new_review():
+        new_book()
+        state['review'] = Review.objects.create(
+            headline='To delete', body='...', rating=3, book=state['book'], user=author
+        )
+
+    def create_url():
+        return reverse('reviews:create_review', args=[state['book'].pk])
+
+    def review_url(name):
+        return reverse(f'reviews:{name}', args=[state['book'].pk, state['review'].pk])
+
+    payload = {'headline': 'Great read', 'body': 'Would read again.', 'rating': 4}
+    rows = [
+        ('create GET', measure(lambda: client.get(create_url()), repeat, setup=new_book)),
+        ('create POST', measure(lambda: client.post(create_url(), payload), repeat, setup=new_book)),
+    ]
+    new_review()
+    rows += [
+        ('edit GET', measure(lambda: client.get(review_url('edit_review')), repeat)),
+        ('edit POST', measure(lambda: client.post(review_url('edit_review'), payload), repeat)),
+        ('delete GET', measure(lambda: client.get(review_url('delete_review')), repeat)),
+        ('delete POST', measure(lambda: client.post(review_url('delete_review')), repeat, setup=new_review)),
+    ]
+    return rows
+
+
+@scenario('feed_render')
+def feed_render(repeat):
+    """Template CPU for feed pages rendering 100 review cards (no queries involved)."""
+    from django.contrib.auth.models import AnonymousUser
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    people, _ = seed(books=20, users=5, reviews_per_book=5)
+    reviews = list(Review.objects.select_related('book', 'user').order_by('-created')[:100])
+    request = RequestFactory().get('/')
+    rows = []
+    for label, user in (('anonymous', AnonymousUser()), ('author of 20%', people[0])):
+        request.user = user
+        for template_name in ('home.html', 'reviews/book_detail.html'):
+            context = {'reviews': reviews, 'book': reviews[0].book}
+            stats = measure(lambda: render_to_string(template_name, context, request=request), repeat)
+            rows.append((f'{template_name}, 100 cards, {label}', stats))
+    return rows
+
+
+@scenario('book_detail')
+def book_detail(repeat):
+    """Latency and query count of the book detail page."""
+    people, shelf = seed(books=2, users=40, reviews_per_book=40)
+    url = reverse('reviews:book_detail', args=[shelf[1].pk])
+    anonymous, viewer = Client(), Client()
+    viewer.force_login(people[0])
+    rows = [('anonymous, cold cache', measure(lambda: anonymous.get(url), repeat, setup=cache.clear))]
+    # warm the page, session and user caches
+    anonymous.get(url)
+    viewer.get(url)
+    rows += [
+        ('anonymous, cached', measure(lambda: anonymous.get(url), repeat)),
+        ('logged-in reviewer', measure(lambda: viewer.get(url), repeat)),
+    ]
+    return rows
+
+
+@scenario('trending')
+def trending(repeat):
+    """Trending endpoint cost as the review table grows (buckets are precomputed)."""
+    from trending.activity import rebuild
+
+    client = Client()
+    url = reverse('trending:week_json')
+    rows = []
+    for books, users in ((10, 10), (100, 50)):
+        seed(books=books, users=users, reviews_per_book=users)
+        rebuild()
+        stats = measure(lambda: client.get(url), repeat, setup=cache.clear)
+        rows.append((f'{Review.objects.count()} reviews, cold cache', stats))
+    return rows
+
+
+def _page_view(client, url, browser_cache):
+    """Load `url` and its static assets like a browser; return `(html_bytes, static_bytes, requests)`.
+
+    `browser_cache` maps asset URLs to their last 200 response: immutable assets
+    are reused without a request, others are revalidated with If-None-Match.
+    """
+    import re
+
+    from django.conf import settings
+
+    response = client.get(url)
+    html, received, requests = len(response.content), 0, 1
+    pattern = r'(?:href|src)="(%s[^"]+)"' % re.escape(settings.STATIC_URL)
+    for asset in re.findall(pattern, response.content.decode()):
+        cached = browser_cache.get(asset)
+        if cached is not None and 'immutable' in cached.get('Cache-Control', ''):
+            continue
+        headers = {'Accept-Encoding': 'gzip, deflate, br'}
+        if cached is not None:
+            headers['If-None-Match'] = cached['ETag']
+        response = client.get(asset, headers=headers)
+        received += len(response.getvalue())
+        requests += 1
+        if response.status_code == 200:
+            browser_cache[asset] = response
+    return html, received, requests
+
+
+@scenario('static_assets')
+def static_assets(repeat):
+    """Bytes and requests for a first and a repeat view of the home page, per static profile.
+
+    Both profiles collect into a temporary STATIC_ROOT served by
+    `StaticFilesMiddleware`; only the storage differs. Bytes are response bodies.
+    """
+    import tempfile
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import override_settings
+
+    middleware = 'litreview.staticfiles.StaticFilesMiddleware'
+    seed(books=10, users=5, reviews_per_book=5)
+    url = reverse('reviews:home')
+    rows = []
+    for label, backend in (
+        ('plain names', 'django.contrib.staticfiles.storage.StaticFilesStorage'),
+        ('hashed + compressed', 'litreview.staticfiles.CompressedManifestStaticFilesStorage'),
+    ):
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            DEBUG=False,
+            STATIC_ROOT=root,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': backend}},
+            MIDDLEWARE=[middleware, *(name for name in settings.MIDDLEWARE if name != middleware)],
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            client, browser_cache = Client(), {}
+            for view in ('first view', 'repeat view'):
+                html, received, requests = _page_view(client, url, browser_cache)
+                stats = {'html_bytes': html, 'static_bytes': received, 'requests': requests}
+                rows.append((f'{label}, {view}', stats))
+    return rows
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils.module_loading import autodiscover_modules
+
+from litreview.bench import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = (
+        'Run performance scenarios registered in <app>/benchmarks.py modules. '
+        'Scenarios run against a throwaway test database, never against real data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help='Scenario names (default: all).')
+        parser.add_argument('--repeat', type=int, default=20, help='Repetitions per measurement.')
+        parser.add_argument('--list', action='store_true', help='List available scenarios and exit.')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('benchmarks')
+        if options['list']:
+            for name in sorted(SCENARIOS):
+                self.stdout.write(name)
+            return
+
+        names = options['scenarios'] or sorted(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(unknown)}")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for name in names:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for label, stats in SCENARIOS[name](repeat=options['repeat']):
+                    details = '  '.join(f'{key}={value}' for key, value in stats.items())
+                    self.stdout.write(f'  {label:<52} {details}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from litreview import importtime
+
+
+def project_packages():
+    """Top-level packages of this project: the settings package and the apps under BASE_DIR."""
+    packages = {settings.SETTINGS_MODULE.split('.')[0]}
+    for config in apps.get_app_configs():
+        if Path(config.path).resolve().is_relative_to(Path(settings.BASE_DIR).resolve()):
+            packages.add(config.name.split('.')[0])
+    return packages
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile the imports done when a worker starts (python -X importtime style), '
+        'in a fresh interpreter. Includes modules loaded through importlib, which '
+        '-X importtime does not report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'modules', nargs='*', default=['litreview.wsgi'],
+            help='Modules to import (default: litreview.wsgi). Add ROOT_URLCONF, e.g. '
+                 'litreview.urls, to include the work done by the first request.',
+        )
+        parser.add_argument('--top', type=int, default=15, help='Rows per table.')
+        parser.add_argument('--tree', action='store_true', help='Print every import, nested.')
+        parser.add_argument(
+            '--budget', type=float, default=None,
+            help='Fail if the total exceeds this many ms (e.g. 1000).',
+        )
+
+    def handle(self, *args, **options):
+        records = importtime.run(options['modules'])
+        total_ms = importtime.total_ms(records)
+
+        if options['tree']:
+            self.stdout.write('import time: self [us] | cumulative | imported package')
+            for name, depth, own, cumulative in records:
+                self.stdout.write(f"import time: {own:>9} | {cumulative:>10} | {'  ' * depth}{name}")
+            self.stdout.write('')
+
+        top = options['top']
+        self._table('Slowest imports (cumulative)', sorted(records, key=lambda r: -r[3])[:top])
+        self._table('Slowest modules (self)', sorted(records, key=lambda r: -r[2])[:top])
+        packages = project_packages()
+        project = [record for record in records if record[0].split('.')[0] in packages]
+        self._table('Project modules', sorted(project, key=lambda r: -r[3])[:top])
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Cold start of {', '.join(options['modules'])}: {total_ms:.1f} ms, {len(records)} modules"
+        ))
+        if options['budget'] is not None and total_ms > options['budget']:
+            raise CommandError(f"Cold start took {total_ms:.1f} ms, over the {options['budget']:.0f} ms budget.")
+
+    def _table(self, title, records):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(f"  {'cumulative ms':>13} {'self ms':>8}  module")
+        for name, _, own, cumulative in records:
+            self.stdout.write(f'  {cumulative / 1000:>13.1f} {own / 1000:>8.1f}  {name}')
+        self.stdout.write('')
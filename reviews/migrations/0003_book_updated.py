@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 06:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_created_id_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('book', 'user'), name='review_book_user_unique'),
+        ),
+    ]
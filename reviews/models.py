@@ -16,6 +16,11 @@ class Book(models.Model):
     image = models.ImageField(verbose_name="Book cover", null=True, blank=True)
     description = models.TextField(blank=True)
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # keyset pagination of the JSON API walks (created, id)
+        indexes = [models.Index(fields=['created', 'id'], name='book_created_id_idx')]
 
     def __str__(self):
         return f"{Truncator(self.title).chars(30)}"
@@ -37,6 +42,12 @@ class Review(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # feeds are ordered by creation; the JSON API pages on (created, id)
+        indexes = [models.Index(fields=['created', 'id'], name='review_created_id_idx')]
+        # one review per user per book, also under concurrent submissions
+        constraints = [models.UniqueConstraint(fields=['book', 'user'], name='review_book_user_unique')]
+
     def __str__(self):
         return f"{Truncator(self.headline).chars(30)} (by {self.user.full_name})"
 
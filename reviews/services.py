@@ -0,0 +1,151 @@
+"""Write-side service layer for reviews.
+
+Every write performed through `ReviewService` runs in a single atomic
+transaction. Derived work (feeds, counters, search index, caches, ...) is never
+done inline: handlers registered with `on_review_commit` receive the batch of
+`ReviewEvent`s produced by a transaction once that transaction has committed.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.shortcuts import get_object_or_404
+
+from .models import Book, Review
+
+_commit_handlers = []
+
+
+class AlreadyReviewed(Exception):
+    """The service user already has a review of the book."""
+
+
+@dataclass(frozen=True)
+class ReviewEvent:
+    """A committed change to a review, as seen by side-effect handlers."""
+
+    action: str  # 'created', 'updated' or 'deleted'
+    review_id: int
+    book_id: int
+    user_id: int
+    rating: int
+    previous_rating: int | None
+    created: datetime
+
+
+def on_review_commit(handler):
+    """Register `handler(events)` to be called with each committed batch of events.
+
+    Handlers run after the commit, each one isolated from the others: an exception
+    raised by a handler is logged and does not affect the request or other handlers.
+    """
+    _commit_handlers.append(handler)
+    return handler
+
+
+def _dispatch(events):
+    for handler in list(_commit_handlers):
+        transaction.on_commit(partial(handler, events), robust=True)
+
+
+class ReviewService:
+    """Performs review writes on behalf of `user`.
+
+    Objects loaded through the service are memoized for its lifetime, so a view can
+    ask for the same book several times during a request and hit the database once.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._books = {}
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block atomically and queue its events for dispatch on commit."""
+        events = []
+        with transaction.atomic():
+            yield events
+            if events:
+                transaction.on_commit(partial(_dispatch, tuple(events)))
+
+    def get_book(self, pk):
+        """Return the Book `pk`, annotated with `user_has_review` for the service user.
+
+        Raises Http404 when the book does not exist.
+        """
+        if pk not in self._books:
+            queryset = Book.objects.annotate(
+                user_has_review=Exists(Review.objects.filter(book=OuterRef('pk'), user=self.user))
+            )
+            self._books[pk] = get_object_or_404(queryset, pk=pk)
+        return self._books[pk]
+
+    def create_review(self, book, review):
+        """Attach `review` to `book` and the service user, then save it.
+
+        Raises AlreadyReviewed when the user has reviewed `book` already, even if
+        that review was posted concurrently (e.g. a double submit) after the
+        caller checked `user_has_review`.
+        """
+        review.book = book
+        review.user = self.user
+        try:
+            with self._transaction() as events:
+                review.save()
+                events.append(self._event('created', review))
+        except IntegrityError:
+            if not Review.objects.filter(book=book, user=self.user).exists():
+                raise
+            raise AlreadyReviewed(f'{self.user} already reviewed {book}.')
+        book.user_has_review = True
+        return review
+
+    def update_review(self, review, previous_rating):
+        """Save changes made to `review`; `previous_rating` is its rating before the edit."""
+        with self._transaction() as events:
+            review.save()
+            events.append(self._event('updated', review, previous_rating))
+        return review
+
+    def delete_review(self, review):
+        """Delete `review`."""
+        with self._transaction() as events:
+            event = self._event('deleted', review, review.rating)
+            review.delete()
+            events.append(event)
+
+    def delete_reviews(self, queryset):
+        """Delete every review in `queryset` in one transaction; return how many were deleted.
+
+        Events are built from a single `values()` query and the rows are removed
+        with one DELETE, however many reviews are selected.
+        """
+        with self._transaction() as events:
+            rows = list(queryset.values('pk', 'book_id', 'user_id', 'rating', 'created'))
+            for row in rows:
+                events.append(ReviewEvent(
+                    action='deleted',
+                    review_id=row['pk'],
+                    book_id=row['book_id'],
+                    user_id=row['user_id'],
+                    rating=row['rating'],
+                    previous_rating=row['rating'],
+                    created=row['created'],
+                ))
+            Review.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+        return len(rows)
+
+    @staticmethod
+    def _event(action, review, previous_rating=None):
+        return ReviewEvent(
+            action=action,
+            review_id=review.pk,
+            book_id=review.book_id,
+            user_id=review.user_id,
+            rating=review.rating,
+            previous_rating=previous_rating,
+            created=review.created,
+        )
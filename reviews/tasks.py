@@ -0,0 +1,41 @@
+"""Background tasks for the reviews app (run by `manage.py run_workers`)."""
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from jobs.registry import task
+
+from .models import Book
+
+# covers larger than this (width, height) are downscaled after upload
+COVER_MAX_SIZE = (600, 900)
+
+
+@task
+def process_book_cover(book_id):
+    """Downscale the cover of Book `book_id` to fit `COVER_MAX_SIZE`, keeping its format."""
+    from PIL import Image
+
+    book = Book.objects.filter(pk=book_id).first()
+    if book is None or not book.image:
+        return
+    with book.image.open('rb') as fh:
+        image = Image.open(fh)
+        image.load()
+    if image.width <= COVER_MAX_SIZE[0] and image.height <= COVER_MAX_SIZE[1]:
+        return
+
+    image_format = image.format
+    image.thumbnail(COVER_MAX_SIZE)
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    # save the copy under a new name and only then switch the book to it, so the
+    # cover never goes missing; the original is removed once nothing points at it
+    storage, name = book.image.storage, book.image.name
+    new_name = storage.save(name, ContentFile(buffer.getvalue()))
+    if Book.objects.filter(pk=book.pk, image=name).update(image=new_name, updated=timezone.now()):
+        storage.delete(name)
+    else:
+        # the cover was replaced while we were resizing it: keep the new upload
+        storage.delete(new_name)
@@ -1,3 +1,303 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.text import Truncator
+
+from trending.models import HourlyBookActivity
+
+from .management.commands.profile_imports import project_packages
+from .models import Book, Review
+from .services import AlreadyReviewed, ReviewService
+from .tasks import COVER_MAX_SIZE, process_book_cover
+from .views import BookDetailView
+from .templatetags.review_tags import excerpt
+
+
+class ExcerptTests(SimpleTestCase):
+    """`excerpt` relies on undocumented helpers of django.utils.text: it must keep
+    producing exactly what `Truncator.chars` does."""
+
+    texts = [
+        '',
+        'Short body.',
+        'x' * 299,
+        'x' * 300,
+        'x' * 301,
+        'Dolor sit amet ' * 40,
+        '  leading and trailing whitespace  ' * 12,
+        'Line one.\nLine two.\n' * 30,
+        'Caf\u00e9 cr\u00e8me br\u00fbl\u00e9e ' * 30,
+        'e\u0301' * 400,  # combining accents are not counted by Truncator
+        '\U0001f4da emoji ' * 50,
+    ]
+
+    def test_matches_truncator(self):
+        for text in self.texts:
+            for length in (0, 1, 2, 10, 299, 300, 301):
+                with self.subTest(text=text[:20], length=length):
+                    self.assertEqual(excerpt(text, length), Truncator(text).chars(length))
+
+
+class ReviewAdminTests(TestCase):
+    """Admin writes go through ReviewService, so the trending buckets follow them."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw', first_name='A', last_name='D')
+        self.author = User.objects.create(username='reader', first_name='Ada', last_name='Reader')
+        self.book = Book.objects.create(title='Dune')
+        self.client.force_login(self.admin)
+
+    def activity(self):
+        row = HourlyBookActivity.objects.get(book=self.book)
+        return row.reviews_count, row.rating_sum
+
+    def test_add_and_change(self):
+        data = {'headline': 'h', 'body': 'b', 'rating': 4, 'book': self.book.pk, 'user': self.author.pk}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:reviews_review_add'), data)
+        self.assertEqual(response.status_code, 302)
+        review = Review.objects.get()
+        self.assertEqual(review.user, self.author)
+        self.assertEqual(self.activity(), (1, 4))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:reviews_review_change', args=[review.pk]), {**data, 'rating': 1})
+        self.assertEqual(self.activity(), (1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:reviews_review_delete', args=[review.pk]), {'post': 'yes'})
+        self.assertEqual(self.activity(), (0, 0))
+
+    def test_book_and_author_are_fixed_once_created(self):
+        other = Book.objects.create(title='Emma')
+        review = Review.objects.create(book=self.book, user=self.author, headline='h', body='b', rating=4)
+        data = {'headline': 'h', 'body': 'b', 'rating': 4, 'book': other.pk, 'user': self.admin.pk}
+        self.client.post(reverse('admin:reviews_review_change', args=[review.pk]), data)
+        review.refresh_from_db()
+        self.assertEqual((review.book, review.user), (self.book, self.author))
+
+
+class ProcessBookCoverTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, size):
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGB', size).save(buffer, format='PNG')
+        book = Book.objects.create(title='Dune')
+        book.image.save('cover.png', ContentFile(buffer.getvalue()))
+        return book
+
+    def test_large_cover_is_replaced_by_a_downscaled_copy(self):
+        from PIL import Image
+
+        book = self.upload((1200, 1800))
+        original, updated = book.image.name, book.updated
+        process_book_cover(book.pk)
+        book.refresh_from_db()
+        self.assertNotEqual(book.image.name, original)
+        self.assertFalse(default_storage.exists(original))
+        self.assertGreater(book.updated, updated)
+        with book.image.open('rb') as fh:
+            self.assertEqual(Image.open(fh).size, COVER_MAX_SIZE)
+
+    def test_small_cover_is_left_alone(self):
+        book = self.upload((60, 90))
+        original = book.image.name
+        process_book_cover(book.pk)
+        book.refresh_from_db()
+        self.assertEqual(book.image.name, original)
+        self.assertTrue(default_storage.exists(original))
+
+
+class ReviewViewTests(TestCase):
+    """Review writes from the site: one review per user and book, owner-only edits,
+    and the query counts of each page."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create(username='reader', first_name='Ada', last_name='Reader')
+        self.other = User.objects.create(username='other', first_name='Bob', last_name='Other')
+        self.book = Book.objects.create(title='Dune')
+        self.client.force_login(self.author)
+        self.data = {'headline': 'h', 'body': 'b', 'rating': 4}
+
+    def review(self, rating=4):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ReviewService(self.author).create_review(
+                self.book, Review(headline='h', body='b', rating=rating)
+            )
+
+    def activity(self):
+        row = HourlyBookActivity.objects.get(book=self.book)
+        return row.reviews_count, row.rating_sum
+
+    def test_create(self):
+        url = reverse('reviews:create_review', args=[self.book.pk])
+        # session, user, book with the "already reviewed" flag
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, self.data)
+        self.assertRedirects(response, reverse('reviews:book_detail', args=[self.book.pk]), fetch_redirect_response=False)
+        review = Review.objects.get()
+        self.assertEqual((review.book, review.user), (self.book, self.author))
+        self.assertEqual(self.activity(), (1, 4))
+
+    def test_duplicate_create_is_refused(self):
+        self.review()
+        url = reverse('reviews:create_review', args=[self.book.pk])
+        self.assertRedirects(self.client.get(url), reverse('reviews:book_detail', args=[self.book.pk]), fetch_redirect_response=False)
+        self.client.post(url, self.data)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_concurrent_duplicate_create_is_refused(self):
+        # a double submit: both requests passed the "already reviewed" check
+        self.review()
+        with self.assertRaises(AlreadyReviewed):
+            ReviewService(self.author).create_review(self.book, Review(headline='h', body='b', rating=1))
+        self.assertEqual(Review.objects.count(), 1)
+        self.assertEqual(self.activity(), (1, 4))
+
+        self.book.user_has_review = False
+        with mock.patch.object(ReviewService, 'get_book', return_value=self.book):
+            response = self.client.post(reverse('reviews:create_review', args=[self.book.pk]), self.data)
+        self.assertRedirects(response, reverse('reviews:book_detail', args=[self.book.pk]), fetch_redirect_response=False)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_edit(self):
+        review = self.review(rating=4)
+        url = reverse('reviews:edit_review', args=[self.book.pk, review.pk])
+        # session, user, review with its book
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {**self.data, 'rating': 9})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {**self.data, 'rating': 2})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Review.objects.get().rating, 2)
+        self.assertEqual(self.activity(), (1, 2))
+
+    def test_delete(self):
+        review = self.review()
+        url = reverse('reviews:delete_review', args=[self.book.pk, review.pk])
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(self.activity(), (0, 0))
+
+    def test_only_the_owner_can_edit_or_delete(self):
+        review = self.review()
+        self.client.force_login(self.other)
+        edit_url = reverse('reviews:edit_review', args=[self.book.pk, review.pk])
+        delete_url = reverse('reviews:delete_review', args=[self.book.pk, review.pk])
+        self.assertEqual(self.client.get(edit_url).status_code, 403)
+        self.assertEqual(self.client.post(edit_url, {**self.data, 'rating': 1}).status_code, 403)
+        self.assertEqual(self.client.post(delete_url).status_code, 403)
+        self.assertEqual(Review.objects.get().rating, 4)
+
+
+class BookDetailViewTests(TestCase):
+    """The book page costs two queries, and one for anonymous viewers on a cache hit."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.book = Book.objects.create(title='Dune')
+        self.readers = User.objects.bulk_create(
+            User(username=f'reader{i}', first_name='Ada', last_name=f'Reader {i}') for i in range(3)
+        )
+        for i, reader in enumerate(self.readers):
+            Review.objects.create(book=self.book, user=reader, headline=f'h{i}', body='b', rating=i)
+
+    def get(self, user):
+        # called directly, so the session and auth middleware queries are not counted
+        request = RequestFactory().get(reverse('reviews:book_detail', args=[self.book.pk]))
+        request.user = user
+        response = BookDetailView.as_view()(request, pk=self.book.pk)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def cache_key(self):
+        view = BookDetailView()
+        view.request = RequestFactory().get('/')
+        view.request.user = AnonymousUser()
+        return view.get_cache_key(view.get_queryset().get(pk=self.book.pk))
+
+    def test_logged_in_viewer(self):
+        with self.assertNumQueries(2):
+            response = self.get(self.readers[0])
+        self.assertEqual(response.context_data['user_review'].user, self.readers[0])
+        self.assertEqual(len(response.context_data['reviews']), 3)
+
+    def test_viewer_review_older_than_the_page(self):
+        User = get_user_model()
+        others = User.objects.bulk_create(
+            User(username=f'other{i}', first_name='Bob', last_name='Other') for i in range(3)
+        )
+        for other in others:
+            Review.objects.create(book=self.book, user=other, headline='newer', body='b', rating=5)
+        mine = Review.objects.get(user=self.readers[0])
+        Review.objects.filter(pk=mine.pk).update(created=mine.created - timedelta(days=1))
+        with mock.patch.object(BookDetailView, 'reviews_limit', 4), self.assertNumQueries(2):
+            response = self.get(self.readers[0])
+        context = response.context_data
+        self.assertEqual(context['user_review'].pk, mine.pk)
+        # the page still shows the latest reviews, newest first
+        self.assertEqual(len(context['reviews']), 4)
+        self.assertNotIn(mine, context['reviews'])
+        self.assertEqual(context['reviews'], sorted(context['reviews'], key=lambda r: r.created, reverse=True))
+
+    def test_viewer_review_within_the_page_keeps_its_place(self):
+        with mock.patch.object(BookDetailView, 'reviews_limit', 2):
+            response = self.get(self.readers[2])
+        self.assertEqual([r.user for r in response.context_data['reviews']], self.readers[:0:-1])
+
+    def test_anonymous_viewer_is_served_from_the_cache(self):
+        with self.assertNumQueries(2):
+            first = self.get(AnonymousUser())
+        with self.assertNumQueries(1):
+            second = self.get(AnonymousUser())
+        self.assertEqual(second.content, first.content)
+
+    def test_cache_key_changes_with_every_review_write(self):
+        reader = get_user_model().objects.create(username='new', first_name='New', last_name='Reader')
+        keys = [self.cache_key()]
+        review = ReviewService(reader).create_review(self.book, Review(headline='h', body='b', rating=3))
+        keys.append(self.cache_key())
+        review.rating = 4
+        ReviewService(reader).update_review(review, previous_rating=3)
+        keys.append(self.cache_key())
+        ReviewService(reader).delete_review(review)
+        keys.append(self.cache_key())
+        for before, after in zip(keys, keys[1:]):
+            self.assertNotEqual(before, after)
+
+
+class ProjectPackagesTests(SimpleTestCase):
+    def test_apps_under_base_dir_and_the_settings_package(self):
+        self.assertEqual(project_packages(), {'litreview', 'reviews', 'users', 'jobs', 'trending', 'api'})
@@ -1,10 +1,16 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, redirect
+from django.http import HttpResponse, HttpResponseRedirect
+from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
-from django.db.models import Avg, Count
+from django.db.models import Avg, Case, Count, Max, OuterRef, Subquery, When
+from django.utils.functional import cached_property
 from .models import Review, Book
+from .services import AlreadyReviewed, ReviewService
+from .tasks import process_book_cover
+from jobs.queue import enqueue
 
 
 class HomeView(ListView):
@@ -29,8 +35,8 @@ class HomeView(ListView):
 		user = self.request.user
 		if user.is_authenticated:
 			following_qs = user.following.all()
-			return Review.objects.filter(user__in=following_qs).order_by('-created')
-		return Review.objects.all().order_by('-created')
+			return Review.objects.filter(user__in=following_qs).select_related('book', 'user').order_by('-created')
+		return Review.objects.select_related('book', 'user').order_by('-created')
 
 
 class AllReviewsView(ListView):
@@ -38,7 +44,7 @@ class AllReviewsView(ListView):
 	model = Review
 	template_name = 'reviews/all_reviews.html'
 	context_object_name = 'reviews'
-	queryset = Review.objects.all().order_by('-created')
+	queryset = Review.objects.select_related('book', 'user').order_by('-created')
 	paginate_by = 10
 
 
@@ -77,32 +83,84 @@ class BookSearchView(ListView):
 class BookDetailView(DetailView):
 	"""Display a single book and its reviews.
 
+	The page costs two queries: the book with its rating aggregates (and, for a
+	logged-in viewer, the pk of their review), then the latest `reviews_limit`
+	reviews joined with their authors, led by the viewer's review however old it is.
+	Anonymous viewers get a cached copy of the page, keyed on the book's version.
+
 	Context includes:
-	- reviews: list of Review objects for this book
+	- reviews: list of (at most `reviews_limit`) Review objects for this book
 	- user_has_review: whether the current user already reviewed this book
 	- user_review: the user's review object when present
 	- image_exists: boolean indicating whether the book cover exists in storage
+	- book.avg_rating / book.reviews_count: rating aggregates over all reviews
 	"""
 	model = Book
 	template_name = 'reviews/book_detail.html'
 	context_object_name = 'book'
+	reviews_limit = 50
+	cache_timeout = 300
+
+	def get_queryset(self):
+		"""Annotate the book with its rating aggregates and version information."""
+		queryset = Book.objects.annotate(
+			avg_rating=Avg('review__rating'),
+			reviews_count=Count('review'),
+			reviews_updated=Max('review__updated'),
+		)
+		user = self.request.user
+		if user.is_authenticated:
+			queryset = queryset.annotate(user_review_pk=Subquery(
+				Review.objects.filter(book=OuterRef('pk'), user=user).values('pk')[:1]
+			))
+		return queryset
+
+	def get(self, request, *args, **kwargs):
+		"""Serve anonymous viewers from the cache when the book has not changed."""
+		if request.user.is_authenticated:
+			return super().get(request, *args, **kwargs)
+		self.object = self.get_object()
+		key = self.get_cache_key(self.object)
+		content = cache.get(key)
+		if content is None:
+			response = self.render_to_response(self.get_context_data(object=self.object))
+			response.render()
+			cache.set(key, response.content, self.cache_timeout)
+			return response
+		return HttpResponse(content)
+
+	@staticmethod
+	def get_cache_key(book):
+		"""Cache key that changes whenever the book or any of its reviews changes."""
+		version = '-'.join(str(part) for part in (
+			book.updated.timestamp(),
+			book.reviews_count,
+			book.reviews_updated.timestamp() if book.reviews_updated else 0,
+		))
+		return f'reviews:book_detail:{book.pk}:{version}'
 
 	def get_context_data(self, **kwargs):
 		"""Add reviews and user-specific flags to the book detail context."""
 		ctx = super().get_context_data(**kwargs)
 		book = self.object
-		reviews = Review.objects.filter(book=book).order_by('-created')
+		queryset = Review.objects.filter(book=book).select_related('user')
+		user_review_pk = getattr(book, 'user_review_pk', None)
+		user_review = None
+		if user_review_pk is None:
+			reviews = list(queryset.order_by('-created')[:self.reviews_limit])
+		else:
+			# the viewer's review first, then the latest others: one query even when
+			# the viewer's review is older than the reviews shown on the page
+			reviews = list(queryset.order_by(
+				Case(When(pk=user_review_pk, then=0), default=1), '-created'
+			)[:self.reviews_limit + 1])
+			if reviews and reviews[0].pk == user_review_pk:
+				user_review = reviews[0]
+				reviews.sort(key=lambda review: review.created, reverse=True)
+			reviews = reviews[:self.reviews_limit]
 		ctx['reviews'] = reviews
-		user = self.request.user
-		ctx['user_has_review'] = False
-		ctx['user_review'] = None
-		if user.is_authenticated:
-			try:
-				user_review = Review.objects.get(book=book, user=user)
-				ctx['user_has_review'] = True
-				ctx['user_review'] = user_review
-			except Review.DoesNotExist:
-				pass
+		ctx['user_has_review'] = user_review is not None
+		ctx['user_review'] = user_review
 
 		image_exists = False
 		try:
@@ -114,11 +172,24 @@ class BookDetailView(DetailView):
 		return ctx
 
 
-class CreateReviewView(LoginRequiredMixin, CreateView):
+class ReviewServiceMixin:
+	"""Provide a per-request `ReviewService` bound to the current user."""
+
+	@cached_property
+	def service(self):
+		return ReviewService(self.request.user)
+
+
+class CreateReviewView(LoginRequiredMixin, ReviewServiceMixin, CreateView):
 	"""Create a review for a given book (one review per user per book).
 
 	- Prevents a user from creating more than one review per book via `dispatch`.
 	- Associates the created Review with the Book and the requesting user in `form_valid`.
+
+	The book is loaded once per request by the `ReviewService`, together with the
+	"already reviewed" flag, and the insert runs in a single transaction. A
+	concurrent duplicate (e.g. a double submit) is caught by the unique constraint
+	on (book, user) and answered like the `dispatch` check.
 	"""
 	model = Review
 	fields = ['headline', 'body', 'rating']
@@ -126,8 +197,10 @@ class CreateReviewView(LoginRequiredMixin, CreateView):
 
 	def dispatch(self, request, *args, **kwargs):
 		"""Block creation if the user already has a review for the book."""
+		if not request.user.is_authenticated:
+			return self.handle_no_permission()
 		book_pk = kwargs.get('pk')
-		if Review.objects.filter(book__pk=book_pk, user=request.user).exists():
+		if self.service.get_book(book_pk).user_has_review:
 			messages.error(request, 'You already posted a review for this book.')
 			return redirect('reviews:book_detail', pk=book_pk)
 		return super().dispatch(request, *args, **kwargs)
@@ -140,19 +213,19 @@ class CreateReviewView(LoginRequiredMixin, CreateView):
 			form.add_error('rating', 'Rating must be an integer between 0 and 5.')
 			return self.form_invalid(form)
 
-		book_pk = self.kwargs.get('pk')
-		book = get_object_or_404(Book, pk=book_pk)
-		form.instance.book = book
-		form.instance.user = self.request.user
-		response = super().form_valid(form)
+		book = self.service.get_book(self.kwargs.get('pk'))
+		try:
+			self.object = self.service.create_review(book, form.save(commit=False))
+		except AlreadyReviewed:
+			messages.error(self.request, 'You already posted a review for this book.')
+			return redirect('reviews:book_detail', pk=book.pk)
 		messages.success(self.request, 'Review posted.')
-		return response
+		return HttpResponseRedirect(self.get_success_url())
 
 	def get_context_data(self, **kwargs):
 		"""Include the current Book object in the template context."""
 		ctx = super().get_context_data(**kwargs)
-		book_pk = self.kwargs.get('pk')
-		ctx['book'] = get_object_or_404(Book, pk=book_pk)
+		ctx['book'] = self.service.get_book(self.kwargs.get('pk'))
 		return ctx
 
 	def get_success_url(self):
@@ -163,6 +236,7 @@ class CreateBookView(LoginRequiredMixin, CreateView):
 	"""Allow authenticated users to create a new Book.
 
 	- Validates there is no existing book with the same title (case-insensitive).
+	- Queues the cover image for background processing.
 	- Adds helpful context items for the template (form_title, cancel_url).
 	"""
 
@@ -179,6 +253,9 @@ class CreateBookView(LoginRequiredMixin, CreateView):
 			return self.form_invalid(form)
 
 		response = super().form_valid(form)
+		if self.object.image:
+			# resizing happens in a background worker, not in the request
+			enqueue(process_book_cover.task_name, {'book_id': self.object.pk}, dedupe_key=f'cover:{self.object.pk}')
 		messages.success(self.request, 'Book created.')
 		return response
 
@@ -197,12 +274,26 @@ class CreateBookView(LoginRequiredMixin, CreateView):
 		return super().dispatch(request, *args, **kwargs)
 
 
-class ReviewOwnerMixin(UserPassesTestMixin):
-	"""Mixin to ensure the current user is the owner of a Review instance."""
+class ReviewOwnerMixin(ReviewServiceMixin, UserPassesTestMixin):
+	"""Mixin to ensure the current user is the owner of a Review instance.
+
+	The review (and its book) is loaded once per request and reused by `test_func`,
+	the view handlers and `get_context_data`.
+	"""
+
+	def get_queryset(self):
+		return super().get_queryset().select_related('book')
+
+	def get_object(self, queryset=None):
+		if not hasattr(self, '_review'):
+			self._review = super().get_object(queryset)
+			# keep the stored rating around: form validation mutates the instance
+			self._original_rating = self._review.rating
+		return self._review
 
 	def test_func(self):
 		obj = self.get_object()
-		return obj.user == self.request.user
+		return obj.user_id == self.request.user.pk
 
 
 class EditReviewView(LoginRequiredMixin, ReviewOwnerMixin, UpdateView):
@@ -219,8 +310,7 @@ class EditReviewView(LoginRequiredMixin, ReviewOwnerMixin, UpdateView):
 	def get_context_data(self, **kwargs):
 		ctx = super().get_context_data(**kwargs)
 		# the review object is the object being edited; add its book to context
-		review = self.get_object()
-		ctx['book'] = review.book
+		ctx['book'] = self.object.book
 		return ctx
 
 	def form_valid(self, form):
@@ -230,9 +320,9 @@ class EditReviewView(LoginRequiredMixin, ReviewOwnerMixin, UpdateView):
 			form.add_error('rating', 'Rating must be an integer between 0 and 5.')
 			return self.form_invalid(form)
 
-		response = super().form_valid(form)
+		self.object = self.service.update_review(form.save(commit=False), self._original_rating)
 		messages.success(self.request, 'Review updated.')
-		return response
+		return HttpResponseRedirect(self.get_success_url())
 
 
 class DeleteReviewView(LoginRequiredMixin, ReviewOwnerMixin, DeleteView):
@@ -246,6 +336,10 @@ class DeleteReviewView(LoginRequiredMixin, ReviewOwnerMixin, DeleteView):
 
 	def get_context_data(self, **kwargs):
 		ctx = super().get_context_data(**kwargs)
-		review = self.get_object()
-		ctx['book'] = review.book
+		ctx['book'] = self.object.book
 		return ctx
+
+	def form_valid(self, form):
+		success_url = self.get_success_url()
+		self.service.delete_review(self.object)
+		return HttpResponseRedirect(success_url)
@@ -0,0 +1,163 @@
+"""Time-bucketed review activity per book, and the "trending" ranking built on it.
+
+Review writes add deltas to `HourlyBookActivity` (see `trending.handlers`).
+`compact` periodically folds hourly buckets older than `HOURLY_RETENTION` into
+`DailyBookActivity` and deletes daily buckets older than `DAILY_RETENTION`, the
+longest window `trending_books` accepts. Both tables therefore stay bounded by
+the number of active books, however large the `Review` table grows: a ranking
+over the last week reads at most a week of daily rows plus two days of hourly
+rows per active book.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from reviews.models import Book, Review
+
+from .models import DailyBookActivity, HourlyBookActivity
+
+# hourly buckets older than this are folded into daily buckets by `compact`
+HOURLY_RETENTION = timedelta(hours=48)
+# daily buckets older than this are deleted by `compact`
+DAILY_RETENTION = timedelta(days=30)
+TRENDING_CACHE_TIMEOUT = 60
+
+
+def hour_bucket(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment):
+    return hour_bucket(moment).replace(hour=0)
+
+
+def add_activity(model, deltas):
+    """Add `{(book_id, bucket): (reviews_count, rating_sum)}` deltas to `model` rows."""
+    for (book_id, bucket), (count, rating) in deltas.items():
+        if not count and not rating:
+            continue
+        rows = model.objects.filter(book_id=book_id, bucket=bucket)
+        increments = {'reviews_count': F('reviews_count') + count, 'rating_sum': F('rating_sum') + rating}
+        if rows.update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(book_id=book_id, bucket=bucket, reviews_count=count, rating_sum=rating)
+        except IntegrityError:
+            # created concurrently since our update
+            rows.update(**increments)
+
+
+def record_events(events):
+    """Turn a batch of `ReviewEvent`s into hourly activity deltas."""
+    deltas = defaultdict(lambda: [0, 0])
+    for event in events:
+        delta = deltas[event.book_id, hour_bucket(event.created)]
+        if event.action == 'created':
+            delta[0] += 1
+            delta[1] += event.rating
+        elif event.action == 'updated':
+            delta[1] += event.rating - event.previous_rating
+        elif event.action == 'deleted':
+            delta[0] -= 1
+            delta[1] -= event.rating
+    add_activity(HourlyBookActivity, deltas)
+
+
+def compact(now=None):
+    """Fold hourly buckets older than `HOURLY_RETENTION` into daily buckets, and
+    drop daily buckets older than `DAILY_RETENTION`.
+
+    Returns the number of hourly rows compacted.
+    """
+    now = now or timezone.now()
+    cutoff = hour_bucket(now - HOURLY_RETENTION)
+    with transaction.atomic():
+        # lock the rows (where supported) so no increment lands between sum and delete
+        ids = list(
+            HourlyBookActivity.objects.select_for_update()
+            .filter(bucket__lt=cutoff)
+            .values_list('pk', flat=True)
+        )
+        if ids:
+            old = HourlyBookActivity.objects.filter(pk__in=ids)
+            rows = (
+                old.annotate(day=TruncDay('bucket', tzinfo=dt_timezone.utc))
+                .values('book_id', 'day')
+                .annotate(count=Sum('reviews_count'), rating=Sum('rating_sum'))
+            )
+            add_activity(
+                DailyBookActivity,
+                {(row['book_id'], row['day']): (row['count'], row['rating']) for row in rows},
+            )
+            old.delete()
+        DailyBookActivity.objects.filter(bucket__lt=day_bucket(now - DAILY_RETENTION)).delete()
+    return len(ids)
+
+
+def rebuild(now=None):
+    """Recompute both tables from the `Review` table (initial backfill or repair)."""
+    now = now or timezone.now()
+    cutoff = hour_bucket(now - HOURLY_RETENTION)
+    oldest = day_bucket(now - DAILY_RETENTION)
+    with transaction.atomic():
+        HourlyBookActivity.objects.all().delete()
+        DailyBookActivity.objects.all().delete()
+        for model, reviews, trunc in (
+            (HourlyBookActivity, Review.objects.filter(created__gte=cutoff), TruncHour),
+            (DailyBookActivity, Review.objects.filter(created__gte=oldest, created__lt=cutoff), TruncDay),
+        ):
+            rows = (
+                reviews.annotate(bucket=trunc('created', tzinfo=dt_timezone.utc))
+                .values('book_id', 'bucket')
+                .annotate(count=Count('pk'), rating=Sum('rating'))
+            )
+            model.objects.bulk_create(
+                model(book_id=row['book_id'], bucket=row['bucket'], reviews_count=row['count'], rating_sum=row['rating'])
+                for row in rows
+            )
+
+
+def trending_books(days=7, limit=10):
+    """Return the `limit` books with the most reviews over the last `days` days.
+
+    Each entry is a dict with `book`, `reviews_count` and `avg_rating`; ties are
+    broken by average rating. Results are cached for `TRENDING_CACHE_TIMEOUT`.
+    Windows longer than `DAILY_RETENTION` raise ValueError.
+    """
+    if timedelta(days=days) > DAILY_RETENTION:
+        raise ValueError(f'Trending windows are limited to {DAILY_RETENTION.days} days.')
+    key = f'trending:books:{days}:{limit}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    since = timezone.now() - timedelta(days=days)
+    totals = defaultdict(lambda: [0, 0])
+    for model, start in ((DailyBookActivity, day_bucket(since)), (HourlyBookActivity, hour_bucket(since))):
+        rows = (
+            model.objects.filter(bucket__gte=start)
+            .values('book_id')
+            .annotate(count=Sum('reviews_count'), rating=Sum('rating_sum'))
+        )
+        for row in rows:
+            totals[row['book_id']][0] += row['count']
+            totals[row['book_id']][1] += row['rating']
+
+    ranked = sorted(
+        ((book_id, count, rating / count) for book_id, (count, rating) in totals.items() if count > 0),
+        key=lambda item: (-item[1], -item[2]),
+    )[:limit]
+    books = Book.objects.in_bulk([book_id for book_id, _, _ in ranked])
+    result = [
+        {'book': books[book_id], 'reviews_count': count, 'avg_rating': avg_rating}
+        for book_id, count, avg_rating in ranked
+        if book_id in books
+    ]
+    cache.set(key, result, TRENDING_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import DailyBookActivity, HourlyBookActivity
+
+
+@admin.register(HourlyBookActivity, DailyBookActivity)
+class BookActivityAdmin(admin.ModelAdmin):
+    list_display = ('book', 'bucket', 'reviews_count', 'rating_sum')
+    list_select_related = ('book',)
+    date_hierarchy = 'bucket'
+    raw_id_fields = ('book',)
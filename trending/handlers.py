@@ -0,0 +1,9 @@
+from reviews.services import on_review_commit
+
+from .activity import record_events
+
+
+@on_review_commit
+def record_review_activity(events):
+    """Keep the hourly activity buckets in step with committed review writes."""
+    record_events(events)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from trending.activity import compact, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Compact hourly review-activity buckets into daily ones (run it hourly, e.g. from cron). '
+        'With --rebuild, recompute all buckets from the reviews table instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute all buckets from scratch.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild()
+            self.stdout.write(self.style.SUCCESS('Rebuilt trending buckets from reviews.'))
+            return
+        compacted = compact()
+        self.stdout.write(self.style.SUCCESS(f'Compacted {compacted} hourly buckets.'))
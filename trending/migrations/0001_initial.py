@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-19 05:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('reviews', '0003_book_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('reviews_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='trending_daily_bucket')],
+                'constraints': [models.UniqueConstraint(fields=('book', 'bucket'), name='trending_daily_book_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyBookActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('reviews_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='trending_hourly_bucket')],
+                'constraints': [models.UniqueConstraint(fields=('book', 'bucket'), name='trending_hourly_book_bucket')],
+            },
+        ),
+    ]
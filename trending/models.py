@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class BookActivity(models.Model):
+    """Review activity of a book during one time bucket.
+
+    Counters are deltas keyed by the creation time of the reviews involved: a
+    deleted review subtracts from the bucket it was created in.
+    """
+
+    book = models.ForeignKey("reviews.Book", on_delete=models.CASCADE)
+    bucket = models.DateTimeField()
+    reviews_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.book_id} @ {self.bucket:%Y-%m-%d %H:00}>"
+
+
+class HourlyBookActivity(BookActivity):
+    """Activity per book and hour; written on every review change, compacted after a while."""
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'bucket'], name='trending_hourly_book_bucket'),
+        ]
+        indexes = [models.Index(fields=['bucket'], name='trending_hourly_bucket')]
+
+
+class DailyBookActivity(BookActivity):
+    """Activity per book and day, produced by compacting hourly buckets."""
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'bucket'], name='trending_daily_book_bucket'),
+        ]
+        indexes = [models.Index(fields=['bucket'], name='trending_daily_bucket')]
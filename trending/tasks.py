@@ -0,0 +1,10 @@
+"""Background tasks for the trending app (run by `manage.py run_workers`)."""
+from jobs.registry import task
+
+from .activity import compact
+
+
+@task
+def compact_activity():
+    """Fold old hourly activity buckets into daily ones and drop expired daily ones."""
+    compact()
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from reviews.models import Book, Review
+from reviews.services import ReviewService
+
+from .activity import DAILY_RETENTION, compact, day_bucket, hour_bucket, trending_books
+from .models import DailyBookActivity, HourlyBookActivity
+
+
+def totals(model, book):
+    rows = model.objects.filter(book=book)
+    return sum(row.reviews_count for row in rows), sum(row.rating_sum for row in rows)
+
+
+class RecordEventsTests(TestCase):
+    """Review writes made through ReviewService keep the hourly buckets in step."""
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Dune')
+        self.service = ReviewService(get_user_model().objects.create(username='admin', first_name='A', last_name='D'))
+
+    def create(self, rating):
+        # one review per user and book: every review gets its own author
+        user = get_user_model().objects.create(
+            username=f'reader{Review.objects.count()}', first_name='Ada', last_name='Reader'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return ReviewService(user).create_review(self.book, Review(headline='h', body='b', rating=rating))
+
+    def test_create(self):
+        self.create(4)
+        self.create(2)
+        self.assertEqual(totals(HourlyBookActivity, self.book), (2, 6))
+
+    def test_edit_changes_the_rating_sum_only(self):
+        review = self.create(4)
+        review.rating = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.update_review(review, previous_rating=4)
+        self.assertEqual(totals(HourlyBookActivity, self.book), (1, 1))
+
+    def test_delete(self):
+        review = self.create(4)
+        self.create(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.delete_review(review)
+        self.assertEqual(totals(HourlyBookActivity, self.book), (1, 3))
+
+    def test_bulk_delete(self):
+        self.create(4)
+        self.create(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.delete_reviews(Review.objects.filter(book=self.book))
+        self.assertEqual(totals(HourlyBookActivity, self.book), (0, 0))
+
+
+class CompactTests(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title='Dune')
+        self.now = timezone.now()
+
+    def hourly(self, moment, count=1, rating=3):
+        return HourlyBookActivity.objects.create(
+            book=self.book, bucket=hour_bucket(moment), reviews_count=count, rating_sum=rating
+        )
+
+    def test_only_buckets_older_than_48_hours_are_folded(self):
+        kept = self.hourly(self.now - timedelta(hours=47))
+        self.hourly(self.now - timedelta(hours=49), rating=4)
+        self.hourly(self.now - timedelta(hours=50), rating=5)
+        self.assertEqual(compact(self.now), 2)
+        self.assertEqual(list(HourlyBookActivity.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertEqual(totals(DailyBookActivity, self.book), (2, 9))
+
+    def test_folds_into_existing_daily_bucket(self):
+        moment = self.now - timedelta(days=3)
+        DailyBookActivity.objects.create(book=self.book, bucket=day_bucket(moment), reviews_count=1, rating_sum=2)
+        self.hourly(moment)
+        compact(self.now)
+        self.assertEqual(DailyBookActivity.objects.get().reviews_count, 2)
+
+    def test_expired_daily_buckets_are_dropped(self):
+        for age in (DAILY_RETENTION - timedelta(days=1), DAILY_RETENTION + timedelta(days=1)):
+            DailyBookActivity.objects.create(
+                book=self.book, bucket=day_bucket(self.now - age), reviews_count=1, rating_sum=1
+            )
+        compact(self.now)
+        self.assertEqual(DailyBookActivity.objects.count(), 1)
+
+
+class TrendingBooksTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def activity(self, model, book, age, count):
+        bucket = (day_bucket if model is DailyBookActivity else hour_bucket)(self.now - age)
+        model.objects.create(book=book, bucket=bucket, reviews_count=count, rating_sum=count * 3)
+
+    def test_window_boundaries(self):
+        recent, older, expired = (Book.objects.create(title=title) for title in ('recent', 'older', 'expired'))
+        self.activity(HourlyBookActivity, recent, timedelta(hours=1), 3)
+        self.activity(DailyBookActivity, older, timedelta(days=6), 2)
+        self.activity(DailyBookActivity, expired, timedelta(days=9), 10)
+        ranking = trending_books(days=7)
+        self.assertEqual([entry['book'] for entry in ranking], [recent, older])
+        self.assertEqual(ranking[0]['reviews_count'], 3)
+        self.assertEqual(ranking[0]['avg_rating'], 3)
+
+    def test_hourly_and_daily_buckets_add_up(self):
+        book = Book.objects.create(title='both')
+        self.activity(HourlyBookActivity, book, timedelta(hours=2), 1)
+        self.activity(DailyBookActivity, book, timedelta(days=3), 2)
+        self.assertEqual(trending_books(days=7)[0]['reviews_count'], 3)
+
+    def test_books_without_net_reviews_are_left_out(self):
+        book = Book.objects.create(title='deleted')
+        self.activity(HourlyBookActivity, book, timedelta(hours=1), 0)
+        self.assertEqual(trending_books(days=7), [])
+
+    def test_window_longer_than_retention_is_rejected(self):
+        with self.assertRaises(ValueError):
+            trending_books(days=DAILY_RETENTION.days + 1)
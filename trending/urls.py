@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'trending'
+
+urlpatterns = [
+    path('', views.TrendingView.as_view(), name='week'),
+    path('json/', views.TrendingJSONView.as_view(), name='week_json'),
+]
@@ -0,0 +1,43 @@
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views import View
+from django.views.generic import TemplateView
+
+from .activity import trending_books
+
+# the "this week" window and the number of books shown
+WINDOW_DAYS = 7
+LIMIT = 10
+
+
+class TrendingView(TemplateView):
+    """Books with the most reviews this week, from the precomputed activity buckets.
+
+    Context:
+    - trending: list of dicts with `book`, `reviews_count` and `avg_rating`
+    - window_days: size of the window, in days
+    """
+    template_name = 'trending/trending.html'
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx['trending'] = trending_books(days=WINDOW_DAYS, limit=LIMIT)
+        ctx['window_days'] = WINDOW_DAYS
+        return ctx
+
+
+class TrendingJSONView(View):
+    """JSON version of `TrendingView`."""
+
+    def get(self, request):
+        books = [
+            {
+                'id': entry['book'].pk,
+                'title': entry['book'].title,
+                'url': reverse('reviews:book_detail', args=[entry['book'].pk]),
+                'reviews_count': entry['reviews_count'],
+                'avg_rating': round(entry['avg_rating'], 2),
+            }
+            for entry in trending_books(days=WINDOW_DAYS, limit=LIMIT)
+        ]
+        return JsonResponse({'window_days': WINDOW_DAYS, 'books': books})
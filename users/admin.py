@@ -1,6 +1,36 @@
-from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.cache import cache
 
+from litreview.pagination import EstimatedCountPaginator
+
+from .backends import user_cache_key
 from .models import User
 
-admin.site.register(User, UserAdmin)
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    list_display = ('username', 'first_name', 'last_name', 'email', 'is_active', 'is_staff')
+    # `username` is unique, hence indexed: a prefix search can use the index, a substring search cannot
+    search_fields = ('^username',)
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('activate_users', 'deactivate_users')
+
+    def _set_active(self, queryset, is_active):
+        ids = list(queryset.filter(is_active=not is_active).values_list('pk', flat=True))
+        # a single UPDATE skips the post_save signals, so drop the cached users here
+        User.objects.filter(pk__in=ids).update(is_active=is_active)
+        cache.delete_many([user_cache_key(pk) for pk in ids])
+        return len(ids)
+
+    @admin.action(description='Activate selected users', permissions=['change'])
+    def activate_users(self, request, queryset):
+        count = self._set_active(queryset, True)
+        self.message_user(request, f'{count} user(s) activated.', messages.SUCCESS)
+
+    @admin.action(description='Deactivate selected users', permissions=['change'])
+    def deactivate_users(self, request, queryset):
+        count = self._set_active(queryset, False)
+        self.message_user(request, f'{count} user(s) deactivated.', messages.SUCCESS)
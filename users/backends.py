@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that serves `get_user` from the cache.
+
+    `AuthenticationMiddleware` resolves `request.user` through `get_user` on every
+    authenticated request; with a warm cache this costs no query. Cached entries are
+    dropped whenever the user row is saved or deleted (see `users.signals`), and
+    expire after `USER_CACHE_TIMEOUT` seconds otherwise. A timeout of 0 disables
+    the cache (the default without a shared cache, see settings).
+    """
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+        if not timeout:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, timeout)
+        return user
@@ -0,0 +1,53 @@
+"""Benchmark scenarios for the users app (see `manage.py benchmark`)."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from litreview.bench import measure, scenario
+
+# (label, settings) pairs compared by the `session_overhead` scenario
+SESSION_PROFILES = [
+    ('db session + db user', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+        'MESSAGE_STORAGE': 'django.contrib.messages.storage.fallback.FallbackStorage',
+    }),
+    ('cached_db session + cached user', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+        'USER_CACHE_TIMEOUT': 300,
+        'MESSAGE_STORAGE': 'django.contrib.messages.storage.cookie.CookieStorage',
+    }),
+    ('signed_cookies session + cached user', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+        'USER_CACHE_TIMEOUT': 300,
+        'MESSAGE_STORAGE': 'django.contrib.messages.storage.cookie.CookieStorage',
+    }),
+]
+
+
+@scenario('session_overhead')
+def session_overhead(repeat):
+    """Queries spent on session/user loading by an authenticated request.
+
+    The login page issues no queries of its own, so every query counted for it is
+    session or user loading overhead.
+    """
+    User = get_user_model()
+    user = User.objects.create(username='bench-session', first_name='Bench', last_name='Session')
+    other = User.objects.create(username='bench-target', first_name='Bench', last_name='Target')
+    rows = []
+    for label, profile in SESSION_PROFILES:
+        # large --repeat values would otherwise run into the follow rate limit
+        with override_settings(THROTTLE_RATES={}, **profile):
+            cache.clear()
+            client = Client()
+            client.force_login(user)
+            page = reverse('users:login')
+            client.get(page)  # warm the session/user cache
+            rows.append((f'{label}: page', measure(lambda: client.get(page), repeat)))
+            follow = reverse('users:follow', args=[other.pk])
+            rows.append((f'{label}: follow + message', measure(lambda: client.post(follow), repeat)))
+    return rows
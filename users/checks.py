@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# caches whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHE_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Cached sessions and users need a cache shared by all worker processes in production.
+
+    On a per-process cache, a logout, password change or deactivation only clears
+    the copy of the worker that handled it; the others keep the stale entry.
+    """
+    if settings.DEBUG or settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    errors = []
+    if settings.SESSION_ENGINE in CACHE_SESSION_ENGINES:
+        errors.append(Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE!r} needs a shared cache when DEBUG is off.',
+            hint="Configure a shared cache (DJANGO_CACHE_BACKEND) or use the 'db' session engine.",
+            id='users.E001',
+        ))
+    if (
+        'users.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS
+        and getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+    ):
+        errors.append(Error(
+            'CachedModelBackend caches users in a per-process cache while DEBUG is off.',
+            hint='Configure a shared cache (DJANGO_CACHE_BACKEND) or set USER_CACHE_TIMEOUT = 0.',
+            id='users.E002',
+        ))
+    return errors
@@ -1,3 +1,77 @@
-from django.test import TestCase
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
 
-# Create your tests here.
+from .admin import UserAdmin
+from .backends import CachedModelBackend, user_cache_key
+from .checks import check_shared_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+
+
+@override_settings(USER_CACHE_TIMEOUT=300)
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='reader', first_name='Ada', last_name='Reader')
+        self.backend = CachedModelBackend()
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_cached_user_is_dropped_on_save(self):
+        self.backend.get_user(self.user.pk)
+        self.user.first_name = 'Grace'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.backend.get_user(self.user.pk).first_name, 'Grace')
+
+    def test_cached_user_is_dropped_on_delete(self):
+        self.backend.get_user(self.user.pk)
+        self.user.delete()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_cached_user_is_dropped_on_admin_deactivation(self):
+        self.backend.get_user(self.user.pk)
+        UserAdmin(get_user_model(), AdminSite())._set_active(get_user_model().objects.all(), False)
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    @override_settings(USER_CACHE_TIMEOUT=0)
+    def test_zero_timeout_bypasses_the_cache(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend', 'django.contrib.auth.backends.ModelBackend'],
+    USER_CACHE_TIMEOUT=300,
+)
+class SharedCacheCheckTests(SimpleTestCase):
+    def ids(self):
+        return [error.id for error in check_shared_cache(None)]
+
+    @override_settings(DEBUG=False, CACHES=LOCMEM)
+    def test_process_local_cache_in_production(self):
+        self.assertEqual(self.ids(), ['users.E001', 'users.E002'])
+
+    @override_settings(DEBUG=True, CACHES=LOCMEM)
+    def test_process_local_cache_in_development(self):
+        self.assertEqual(self.ids(), [])
+
+    @override_settings(DEBUG=False, CACHES=REDIS)
+    def test_shared_cache(self):
+        self.assertEqual(self.ids(), [])
+
+    @override_settings(
+        DEBUG=False, CACHES=LOCMEM, SESSION_ENGINE='django.contrib.sessions.backends.db', USER_CACHE_TIMEOUT=0,
+    )
+    def test_uncached_sessions_and_users(self):
+        self.assertEqual(self.ids(), [])
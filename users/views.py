@@ -45,7 +45,7 @@ class ProfileView(LoginRequiredMixin, TemplateView):
             context['followers_count'] = User.objects.filter(following__pk=user.pk).count()
             # include the current user's reviews on their profile page
             from reviews.models import Review
-            context['reviews'] = Review.objects.filter(user=user).order_by('-created')
+            context['reviews'] = Review.objects.filter(user=user).select_related('book', 'user').order_by('-created')
             # lists for UI: who the user follows, and who follows the user
             context['following_list'] = list(user.following.all())
             context['followers_list'] = list(User.objects.filter(following__pk=user.pk).order_by('first_name', 'last_name'))
@@ -145,7 +145,7 @@ class UserDetailView(DetailView):
             is_following = user.following.filter(pk=self.object.pk).exists()
         ctx['is_following'] = is_following
         # include the profile user's reviews
-        ctx['reviews'] = Review.objects.filter(user=self.object).order_by('-created')
+        ctx['reviews'] = Review.objects.filter(user=self.object).select_related('book', 'user').order_by('-created')
         # follower/following counts for the profile user
         User = get_user_model()
         ctx['following_count'] = self.object.following.count()